@@ -3,27 +3,138 @@ Main LangChain Agent for AI Portfolio
 Uses Groq LLM with MCP tools for intelligent portfolio management
 """
 import os
+import asyncio
+import inspect
 import logging
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, AsyncIterator
 
+import anyio
 from langchain_groq import ChatGroq
 from langchain.agents import AgentExecutor, create_react_agent
 from langchain.prompts import PromptTemplate
 from langchain.schema import HumanMessage, AIMessage, SystemMessage
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.tools import BaseTool, render_text_description
+from pydantic import PrivateAttr
 from dotenv import load_dotenv
 
-from mcp_tools import create_langchain_tools, MCPToolExecutor
+from mcp_tools import create_langchain_tools, get_default_executor
 from memory import ConversationMemory, get_memory
 from prompts import SYSTEM_PROMPT
 from guardrails_config import validate_input
 import requests
-import json
+import orjson
 
 # Load environment variables
 load_dotenv()
 
 logger = logging.getLogger(__name__)
 
+# ReAct output prefix that precedes the user-facing answer
+FINAL_ANSWER_MARKER = "Final Answer:"
+
+# Recent turns always sent verbatim; older ones get folded into a summary
+MEMORY_KEEP_RECENT_TURNS = 2
+# Summarize once unsummarized older messages exceed this many characters
+# (~4 chars per token, so roughly 500 prompt tokens)
+MEMORY_SUMMARY_TRIGGER_CHARS = 2000
+
+MEMORY_SUMMARY_PROMPT = """Update the running summary of a conversation between a user and their AI portfolio learning assistant.
+
+Current summary:
+{summary}
+
+New messages:
+{messages}
+
+Write a concise updated summary (under 120 words) that keeps facts, decisions, and open questions needed to continue the conversation."""
+
+
+def render_tool_summaries(tools: List[BaseTool]) -> str:
+    """
+    Render a compact tool manifest for the ReAct prompt
+
+    Keeps each tool's call signature (the LLM needs argument names for
+    Action Input) but only the first sentence of its description, since the
+    manifest is re-sent on every reasoning turn.
+
+    Args:
+        tools: Tools to describe
+
+    Returns:
+        One "- name(args): summary" line per tool
+    """
+    lines = []
+    for tool in tools:
+        summary = tool.description.split(". ")[0].rstrip(".")
+        lines.append(f"- {tool.name}{_tool_signature(tool)}: {summary}")
+    return "\n".join(lines)
+
+
+def _tool_signature(tool: BaseTool) -> inspect.Signature:
+    """
+    Build a call signature from the tool's declared argument schema
+
+    Read from args_schema rather than the implementation, so sync and
+    coroutine-backed tools render the same way.
+    """
+    schema = tool.args_schema
+    if isinstance(schema, type) and hasattr(schema, "model_fields"):
+        params = [
+            inspect.Parameter(
+                name,
+                inspect.Parameter.POSITIONAL_OR_KEYWORD,
+                default=inspect.Parameter.empty if field.is_required() else field.default,
+                annotation=field.annotation
+            )
+            for name, field in schema.model_fields.items()
+        ]
+    else:
+        params = [
+            inspect.Parameter(name, inspect.Parameter.POSITIONAL_OR_KEYWORD)
+            for name in tool.args
+        ]
+    return inspect.Signature(params)
+
+
+class ToolUsageTracker(BaseCallbackHandler):
+    """
+    Callback handler that records tool names as the agent calls them
+    """
+
+    # Append directly on the event loop instead of hopping to a thread
+    run_inline = True
+
+    def __init__(self):
+        self.tools_used: List[str] = []
+
+    def on_tool_start(self, serialized: Dict[str, Any], input_str: str, **kwargs: Any) -> None:
+        self.tools_used.append(serialized.get("name") or kwargs.get("name", "unknown"))
+
+
+class BoundedChatGroq(ChatGroq):
+    """
+    ChatGroq whose async model calls share a semaphore
+
+    Only the Groq request itself holds a slot; tool calls and slow SSE
+    readers elsewhere in the agent run do not.
+    """
+
+    _semaphore: anyio.Semaphore = PrivateAttr()
+
+    def __init__(self, *, max_concurrency: int = 8, **kwargs: Any):
+        super().__init__(**kwargs)
+        self._semaphore = anyio.Semaphore(max_concurrency)
+
+    async def _agenerate(self, *args: Any, **kwargs: Any):
+        async with self._semaphore:
+            return await super()._agenerate(*args, **kwargs)
+
+    async def _astream(self, *args: Any, **kwargs: Any):
+        async with self._semaphore:
+            async for chunk in super()._astream(*args, **kwargs):
+                yield chunk
+
 
 class PortfolioAgent:
     """
@@ -35,7 +146,8 @@ class PortfolioAgent:
         groq_api_key: Optional[str] = None,
         model_name: str = "llama-3.3-70b-versatile",
         temperature: float = 0.7,
-        max_iterations: int = 10
+        max_iterations: int = 10,
+        max_concurrency: Optional[int] = None
     ):
         """
         Initialize the portfolio agent
@@ -45,6 +157,8 @@ class PortfolioAgent:
             model_name: Groq model to use
             temperature: LLM temperature (0-1)
             max_iterations: Max iterations for agent reasoning loop
+            max_concurrency: Max in-flight Groq requests per worker
+                (defaults to GROQ_MAX_CONCURRENCY or 8)
         """
         self.groq_api_key = groq_api_key or os.getenv("GROQ_API_KEY")
         if not self.groq_api_key:
@@ -53,22 +167,28 @@ class PortfolioAgent:
         self.model_name = model_name
         self.temperature = temperature
         self.max_iterations = max_iterations
+        self.max_concurrency = max_concurrency or int(os.getenv("GROQ_MAX_CONCURRENCY", "8"))
 
-        # Initialize LLM
-        self.llm = ChatGroq(
+        # Initialize LLM (bounds outstanding Groq requests so bursts don't trip rate limits)
+        self.llm = BoundedChatGroq(
             api_key=self.groq_api_key,
             model_name=self.model_name,
-            temperature=self.temperature
+            temperature=self.temperature,
+            max_concurrency=self.max_concurrency
         )
         logger.info(f"Initialized Groq LLM: {self.model_name}")
 
         # Initialize MCP tools
-        self.mcp_executor = MCPToolExecutor()
+        self.mcp_executor = get_default_executor()
         self.tools = create_langchain_tools(self.mcp_executor)
+        self._tool_by_name = {tool.name: tool for tool in self.tools}
         logger.info(f"Loaded {len(self.tools)} MCP tools")
 
         # Initialize memory
         self.memory = get_memory()
+        # Conversations with a summarization task in flight (and task refs)
+        self._compacting: set = set()
+        self._background_tasks: set = set()
 
         # Create agent
         self.agent_executor = self._create_agent()
@@ -111,11 +231,18 @@ Thought: {agent_scratchpad}
 """
         )
 
-        # Create agent
+        logger.info(
+            f"Tool manifest: {len(render_tool_summaries(self.tools))} chars "
+            f"(full descriptions: {len(render_text_description(self.tools))} chars)"
+        )
+
+        # Create agent (static system prompt + tool manifest stay first so the
+        # prompt prefix is identical across turns)
         agent = create_react_agent(
             llm=self.llm,
             tools=self.tools,
-            prompt=react_prompt.partial(system_prompt=SYSTEM_PROMPT)
+            prompt=react_prompt.partial(system_prompt=SYSTEM_PROMPT),
+            tools_renderer=render_tool_summaries
         )
 
         # Create agent executor
@@ -130,7 +257,127 @@ Thought: {agent_scratchpad}
 
         return agent_executor
 
-    def chat(
+    async def _log_security_event(self, message: str, violation_reason: str) -> None:
+        """
+        Record a blocked message in the backend Security Audit log
+
+        Args:
+            message: Blocked user message
+            violation_reason: Reason reported by the guardrails check
+        """
+        try:
+            backend_url = os.getenv("BACKEND_URL", "http://backend:8000")
+            response = await asyncio.to_thread(
+                requests.post,
+                f"{backend_url}/api/security/audit/",
+                json={
+                    "source": "Agent",
+                    "input_content": message,
+                    "violation_type": "jailbreak", # Simplified for demo
+                    "action_taken": "blocked",
+                    "metadata": {"reason": violation_reason}
+                },
+                timeout=5
+            )
+            response.raise_for_status()
+        except Exception as log_err:
+            error_details = ""
+            if hasattr(log_err, "response") and log_err.response is not None:
+                 error_details = f" - Response: {log_err.response.text}"
+            logger.error(f"Failed to log security event: {log_err}{error_details}")
+            raise log_err
+
+    async def _build_input(self, message: str, conversation_id: Optional[str]) -> str:
+        """
+        Prefix the message with recent conversation context, if any
+
+        Args:
+            message: User message
+            conversation_id: Optional conversation ID for context
+
+        Returns:
+            Agent input string
+        """
+        context = ""
+        if conversation_id:
+            context = await self.memory.get_compacted_context(conversation_id)
+
+        if context and context != "No previous conversation context.":
+            return f"{context}\n\nCurrent question: {message}"
+        return message
+
+    async def _store_exchange(
+        self,
+        conversation_id: Optional[str],
+        message: str,
+        response: str,
+        intermediate_steps: int
+    ) -> None:
+        """
+        Persist the user message and agent response to conversation memory
+
+        Args:
+            conversation_id: Optional conversation ID (nothing is stored without one)
+            message: User message
+            response: Agent response
+            intermediate_steps: Number of agent reasoning steps taken
+        """
+        if not conversation_id:
+            return
+
+        await self.memory.add_message(conversation_id, "user", message)
+        await self.memory.add_message(
+            conversation_id,
+            "assistant",
+            response,
+            metadata={
+                "intermediate_steps": intermediate_steps,
+                "model": self.model_name
+            }
+        )
+
+        # Fold older turns into the rolling summary without delaying the reply
+        if conversation_id not in self._compacting:
+            self._compacting.add(conversation_id)
+            task = asyncio.create_task(self._compact_memory(conversation_id))
+            self._background_tasks.add(task)
+            task.add_done_callback(self._background_tasks.discard)
+
+    async def _compact_memory(self, conversation_id: str) -> None:
+        """
+        Summarize older messages once they exceed the size threshold, then
+        cache the rendered context for the next turn
+
+        Args:
+            conversation_id: Conversation to compact
+        """
+        try:
+            summary, pending = await self.memory.get_compaction_candidates(
+                conversation_id,
+                keep_recent=MEMORY_KEEP_RECENT_TURNS
+            )
+            if sum(len(msg["content"]) for msg in pending) >= MEMORY_SUMMARY_TRIGGER_CHARS:
+                prompt = MEMORY_SUMMARY_PROMPT.format(
+                    summary=summary["summary"] or "(none)",
+                    messages="\n".join(f"{msg['role'].capitalize()}: {msg['content']}" for msg in pending)
+                )
+                result = await self.llm.ainvoke(prompt)
+
+                await self.memory.set_summary(
+                    conversation_id,
+                    result.content.strip(),
+                    summary["covered"] + len(pending)
+                )
+                logger.info(f"Compacted {len(pending)} messages for conversation {conversation_id}")
+
+            # Pre-render the next turn's context so _build_input is a single read
+            await self.memory.refresh_context(conversation_id)
+        except Exception as e:
+            logger.error(f"Failed to compact conversation memory: {e}")
+        finally:
+            self._compacting.discard(conversation_id)
+
+    async def chat(
         self,
         message: str,
         conversation_id: Optional[str] = None
@@ -154,28 +401,7 @@ Thought: {agent_scratchpad}
             is_safe, violation_reason = validate_input(message)
             if not is_safe:
                 logger.warning(f"Security violation detected: {violation_reason}")
-                
-                # Log to Backend Security Audit
-                try:
-                    backend_url = os.getenv("BACKEND_URL", "http://backend:8000")
-                    response = requests.post(
-                        f"{backend_url}/api/security/audit/",
-                        json={
-                            "source": "Agent",
-                            "input_content": message,
-                            "violation_type": "jailbreak", # Simplified for demo
-                            "action_taken": "blocked",
-                            "metadata": {"reason": violation_reason}
-                        },
-                        timeout=5
-                    )
-                    response.raise_for_status()
-                except Exception as log_err:
-                    error_details = ""
-                    if hasattr(log_err, "response") and log_err.response is not None:
-                         error_details = f" - Response: {log_err.response.text}"
-                    logger.error(f"Failed to log security event: {log_err}{error_details}")
-                    raise log_err
+                await self._log_security_event(message, violation_reason)
 
                 return {
                     "success": True,
@@ -185,35 +411,23 @@ Thought: {agent_scratchpad}
                 }
             # ------------------------------------------------------------------
 
-            # Get conversation context if available
-            context = ""
-            if conversation_id:
-                context = self.memory.get_context(conversation_id, max_messages=6)
-
             # Prepare input with context
-            if context and context != "No previous conversation context.":
-                full_input = f"{context}\n\nCurrent question: {message}"
-            else:
-                full_input = message
+            full_input = await self._build_input(message, conversation_id)
 
-            # Run agent
-            result = self.agent_executor.invoke({"input": full_input})
+            # Run agent (ChatGroq's async client keeps the event loop free)
+            tool_tracker = ToolUsageTracker()
+            result = await self.agent_executor.ainvoke(
+                {"input": full_input},
+                config={"callbacks": [tool_tracker]}
+            )
 
             # Extract response
             response = result.get("output", "I encountered an issue processing your request.")
 
             # Store in memory
-            if conversation_id:
-                self.memory.add_message(conversation_id, "user", message)
-                self.memory.add_message(
-                    conversation_id,
-                    "assistant",
-                    response,
-                    metadata={
-                        "intermediate_steps": len(result.get("intermediate_steps", [])),
-                        "model": self.model_name
-                    }
-                )
+            await self._store_exchange(
+                conversation_id, message, response, len(result.get("intermediate_steps", []))
+            )
 
             logger.info("Message processed successfully")
 
@@ -223,9 +437,7 @@ Thought: {agent_scratchpad}
                 "conversation_id": conversation_id,
                 "metadata": {
                     "model": self.model_name,
-                    "tools_used": [
-                        step[0].tool for step in result.get("intermediate_steps", [])
-                    ]
+                    "tools_used": tool_tracker.tools_used
                 }
             }
 
@@ -237,7 +449,101 @@ Thought: {agent_scratchpad}
                 "error": str(e)
             }
 
-    def execute_tool(self, tool_name: str, arguments: Dict[str, Any]) -> Dict[str, Any]:
+    async def chat_stream(
+        self,
+        message: str,
+        conversation_id: Optional[str] = None
+    ) -> AsyncIterator[str]:
+        """
+        Process a chat message, yielding the final answer as Groq streams it
+
+        Only tokens after the ReAct "Final Answer:" marker are forwarded, so
+        intermediate Thought/Action text never reaches the client. Memory is
+        persisted once the run completes.
+
+        Args:
+            message: User message
+            conversation_id: Optional conversation ID for context
+
+        Yields:
+            Response text chunks
+        """
+        logger.info(f"Streaming message: {message[:100]}...")
+
+        is_safe, violation_reason = validate_input(message)
+        if not is_safe:
+            logger.warning(f"Security violation detected: {violation_reason}")
+            await self._log_security_event(message, violation_reason)
+            yield f"I cannot answer that request. Security violation detected: {violation_reason}"
+            return
+
+        full_input = await self._build_input(message, conversation_id)
+
+        result: Dict[str, Any] = {}
+        buffers: Dict[str, str] = {}
+        # run_id -> whether any answer text has been yielded for that LLM run
+        answering: Dict[str, bool] = {}
+        async for event in self.agent_executor.astream_events(
+            {"input": full_input}, version="v2"
+        ):
+            kind = event["event"]
+            if kind == "on_chat_model_stream":
+                token = event["data"]["chunk"].content
+                if not token:
+                    continue
+                run_id = event["run_id"]
+                if run_id in answering:
+                    if not answering[run_id]:
+                        token = token.lstrip()
+                        if not token:
+                            continue
+                        answering[run_id] = True
+                    yield token
+                    continue
+                buffers[run_id] = buffers.get(run_id, "") + token
+                marker = buffers[run_id].find(FINAL_ANSWER_MARKER)
+                if marker != -1:
+                    head = buffers.pop(run_id)[marker + len(FINAL_ANSWER_MARKER):].lstrip()
+                    answering[run_id] = bool(head)
+                    if head:
+                        yield head
+            elif kind == "on_chain_end" and not event.get("parent_ids"):
+                result = event["data"].get("output") or {}
+
+        response = result.get("output", "I encountered an issue processing your request.")
+        await self._store_exchange(
+            conversation_id, message, response, len(result.get("intermediate_steps", []))
+        )
+
+    async def chat_batch(
+        self,
+        messages: List[str],
+        conversation_ids: Optional[List[Optional[str]]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Process several chat messages concurrently
+
+        Each message goes through the same guardrails/memory path as chat();
+        the LLM's shared semaphore caps how many Groq requests are in flight at once.
+
+        Args:
+            messages: User messages
+            conversation_ids: Optional conversation IDs, one per message
+
+        Returns:
+            List of chat results in the same order as messages
+        """
+        if conversation_ids is None:
+            conversation_ids = [None] * len(messages)
+        if len(conversation_ids) != len(messages):
+            raise ValueError("conversation_ids must match the number of messages")
+
+        return await asyncio.gather(*[
+            self.chat(message, conversation_id=conversation_id)
+            for message, conversation_id in zip(messages, conversation_ids, strict=True)
+        ])
+
+    async def execute_tool(self, tool_name: str, arguments: Dict[str, Any]) -> Dict[str, Any]:
         """
         Directly execute a specific tool
 
@@ -250,7 +556,7 @@ Thought: {agent_scratchpad}
         """
         try:
             # Find the tool
-            tool = next((t for t in self.tools if t.name == tool_name), None)
+            tool = self._tool_by_name.get(tool_name)
             if not tool:
                 return {
                     "success": False,
@@ -258,12 +564,11 @@ Thought: {agent_scratchpad}
                 }
 
             # Execute tool
-            result = tool.run(arguments)
+            result = await tool.arun(arguments)
 
             # Parse result to check for backend errors
             try:
-                import json
-                result_data = json.loads(result) if isinstance(result, str) else result
+                result_data = orjson.loads(result) if isinstance(result, (str, bytes, bytearray)) else result
 
                 # Check if backend returned an error
                 if isinstance(result_data, dict) and not result_data.get("success", True):
@@ -272,7 +577,7 @@ Thought: {agent_scratchpad}
                         "error": result_data.get("error", "Unknown error from backend"),
                         "tool": tool_name
                     }
-            except (json.JSONDecodeError, AttributeError):
+            except (orjson.JSONDecodeError, AttributeError):
                 # If result isn't JSON, treat it as success
                 pass
 
@@ -3,15 +3,26 @@ FastAPI server for AI Portfolio Agent
 Provides REST API for interacting with the LangChain agent
 """
 import os
+import time
+import asyncio
+import contextlib
 import logging
-from typing import Optional
+from contextlib import asynccontextmanager
+from typing import Dict, List, Optional, Tuple
 from datetime import datetime
 
-from fastapi import FastAPI, HTTPException, Depends
+import httpx
+import orjson
+from fastapi import FastAPI, HTTPException, Depends, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
 from dotenv import load_dotenv
 
+from agent import PortfolioAgent, get_agent
+from guardrails_config import validate_input
+from timeutils import utcnow_iso
+
 # Load environment variables
 load_dotenv()
 
@@ -22,11 +33,80 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Max pending security audit events before new ones are dropped
+AUDIT_QUEUE_SIZE = 1000
+# Seconds to wait at shutdown for queued audit events to be sent
+AUDIT_DRAIN_TIMEOUT = 5.0
+
+
+async def _audit_worker(queue: asyncio.Queue, client: httpx.AsyncClient) -> None:
+    """Drain queued security audit events to the backend, one POST at a time"""
+    backend_url = os.getenv("BACKEND_URL", "http://backend:8000")
+    while True:
+        payload = await queue.get()
+        try:
+            response = await client.post(f"{backend_url}/api/security/audit/", json=payload)
+            response.raise_for_status()
+        except Exception as e:
+            logger.error(f"Failed to audit log violation: {e}")
+        finally:
+            queue.task_done()
+
+
+def _enqueue_audit(app: FastAPI, payload: dict) -> None:
+    """Queue a security audit event without blocking the request"""
+    queue: Optional[asyncio.Queue] = getattr(app.state, "audit_queue", None)
+    if queue is None:
+        logger.error("Audit queue not initialized; dropping security audit event")
+        return
+    try:
+        queue.put_nowait(payload)
+    except asyncio.QueueFull:
+        logger.error("Audit queue full; dropping security audit event")
+
+
+def _resolve_agent(app: FastAPI) -> PortfolioAgent:
+    """Return the agent created at startup, initializing it on first use if startup failed"""
+    agent = getattr(app.state, "agent", None)
+    if agent is None:
+        agent = get_agent()
+        app.state.agent = agent
+    return agent
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Create agent, shared HTTP client and audit worker on startup, close on shutdown"""
+    try:
+        app.state.agent = get_agent()
+    except Exception as e:
+        # Keep serving health/validation; agent endpoints retry initialization on use
+        logger.error(f"Agent initialization failed at startup: {e}")
+        app.state.agent = None
+    app.state.http = httpx.AsyncClient(timeout=5)
+    app.state.audit_queue = asyncio.Queue(maxsize=AUDIT_QUEUE_SIZE)
+    audit_task = asyncio.create_task(_audit_worker(app.state.audit_queue, app.state.http))
+    yield
+    # Flush pending audit events (bounded), then stop the worker before closing its client
+    try:
+        await asyncio.wait_for(app.state.audit_queue.join(), timeout=AUDIT_DRAIN_TIMEOUT)
+    except asyncio.TimeoutError:
+        logger.error(f"Dropping {app.state.audit_queue.qsize()} security audit events at shutdown")
+    audit_task.cancel()
+    with contextlib.suppress(asyncio.CancelledError):
+        await audit_task
+    await app.state.http.aclose()
+    if app.state.agent is not None:
+        await app.state.agent.mcp_executor.aclose()
+        await app.state.agent.memory.aclose()
+
+
 # Create FastAPI app
 app = FastAPI(
     title="AI Portfolio Agent API",
     description="Intelligent agent for portfolio management using LangChain and MCP tools",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # CORS configuration
@@ -54,6 +134,19 @@ class ChatResponse(BaseModel):
     conversation_id: str = Field(..., description="Conversation ID")
     timestamp: str
 
+class BatchChatRequest(BaseModel):
+    messages: List[str] = Field(..., description="User messages to the agent")
+    conversation_ids: Optional[List[str]] = Field(None, description="Optional conversation IDs, one per message")
+
+class BatchChatItem(BaseModel):
+    success: bool
+    response: str = Field(..., description="Agent's response")
+    conversation_id: str = Field(..., description="Conversation ID")
+
+class BatchChatResponse(BaseModel):
+    responses: List[BatchChatItem]
+    timestamp: str
+
 class ToolExecutionRequest(BaseModel):
     tool_name: str = Field(..., description="Name of the MCP tool to execute")
     arguments: dict = Field(default_factory=dict, description="Tool arguments")
@@ -69,7 +162,7 @@ async def health_check():
     """Health check endpoint for Docker healthcheck"""
     return HealthResponse(
         status="healthy",
-        timestamp=datetime.utcnow().isoformat(),
+        timestamp=utcnow_iso(),
         service="ai-portfolio-agent",
         version="1.0.0"
     )
@@ -85,6 +178,8 @@ async def root():
         "endpoints": {
             "health": "/health",
             "chat": "/api/chat",
+            "chat_batch": "/api/chat/batch",
+            "chat_stream": "/api/chat/stream",
             "tools": "/api/tools",
             "docs": "/docs"
         }
@@ -92,7 +187,7 @@ async def root():
 
 # Chat endpoint with agent integration
 @app.post("/api/chat", response_model=ChatResponse)
-async def chat(request: ChatRequest):
+async def chat(request: ChatRequest, http_request: Request):
     """
     Chat with the AI agent
 
@@ -105,17 +200,14 @@ async def chat(request: ChatRequest):
     try:
         logger.info(f"Chat request: {request.message}")
 
-        # Import agent (lazy load to avoid startup issues)
-        from agent import get_agent
-
-        # Get agent instance
-        agent = get_agent()
+        # Get agent instance (created at startup)
+        agent = _resolve_agent(http_request.app)
 
         # Generate conversation ID if not provided
-        conversation_id = request.conversation_id or f"conv_{int(datetime.utcnow().timestamp())}"
+        conversation_id = request.conversation_id or f"conv_{int(time.time())}"
 
         # Process message with agent
-        result = agent.chat(request.message, conversation_id=conversation_id)
+        result = await agent.chat(request.message, conversation_id=conversation_id)
 
         if not result.get("success", False):
             raise HTTPException(status_code=500, detail=result.get("error", "Unknown error"))
@@ -123,13 +215,83 @@ async def chat(request: ChatRequest):
         return ChatResponse(
             response=result["response"],
             conversation_id=conversation_id,
-            timestamp=datetime.utcnow().isoformat()
+            timestamp=utcnow_iso()
         )
 
     except Exception as e:
         logger.error(f"Error in chat endpoint: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail=f"Agent error: {str(e)}")
 
+# Streaming chat endpoint (Server-Sent Events)
+@app.post("/api/chat/stream")
+async def chat_stream(request: ChatRequest, http_request: Request):
+    """
+    Chat with the AI agent, streaming the answer as Server-Sent Events
+
+    Emits `data: {"token": ...}` events while the answer is generated and a
+    final `data: {"done": true, "conversation_id": ...}` event.
+    """
+    logger.info(f"Streaming chat request: {request.message}")
+
+    try:
+        agent = _resolve_agent(http_request.app)
+    except Exception as e:
+        logger.error(f"Error in chat stream endpoint: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"Agent error: {str(e)}") from e
+
+    conversation_id = request.conversation_id or f"conv_{int(time.time())}"
+
+    async def event_stream():
+        try:
+            async for token in agent.chat_stream(request.message, conversation_id=conversation_id):
+                yield b"data: " + orjson.dumps({"token": token}) + b"\n\n"
+        except Exception as e:
+            logger.error(f"Error while streaming chat: {str(e)}", exc_info=True)
+            yield b"data: " + orjson.dumps({"error": str(e)}) + b"\n\n"
+        yield b"data: " + orjson.dumps({"done": True, "conversation_id": conversation_id}) + b"\n\n"
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
+
+# Batch chat endpoint (e.g. for evaluation runs)
+@app.post("/api/chat/batch", response_model=BatchChatResponse)
+async def chat_batch(request: BatchChatRequest, http_request: Request):
+    """
+    Chat with the AI agent for several messages at once
+
+    Messages are processed concurrently, bounded by GROQ_MAX_CONCURRENCY.
+    """
+    if request.conversation_ids is not None and len(request.conversation_ids) != len(request.messages):
+        raise HTTPException(status_code=422, detail="conversation_ids must match the number of messages")
+
+    try:
+        logger.info(f"Batch chat request: {len(request.messages)} messages")
+
+        agent = _resolve_agent(http_request.app)
+
+        # Generate conversation IDs if not provided
+        base_id = f"conv_{int(time.time())}"
+        conversation_ids = request.conversation_ids or [
+            f"{base_id}_{i}" for i in range(len(request.messages))
+        ]
+
+        results = await agent.chat_batch(request.messages, conversation_ids=conversation_ids)
+
+        return BatchChatResponse(
+            responses=[
+                BatchChatItem(
+                    success=result.get("success", False),
+                    response=result.get("response", ""),
+                    conversation_id=conversation_id
+                )
+                for result, conversation_id in zip(results, conversation_ids, strict=True)
+            ],
+            timestamp=utcnow_iso()
+        )
+
+    except Exception as e:
+        logger.error(f"Error in batch chat endpoint: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"Agent error: {str(e)}") from e
+
 # Validation Endpoint
 class ValidationRequest(BaseModel):
     text: str
@@ -139,48 +301,28 @@ class ValidationResponse(BaseModel):
     reason: str
 
 @app.post("/api/validate", response_model=ValidationResponse)
-async def validate_prompt(request: ValidationRequest):
+async def validate_prompt(request: ValidationRequest, http_request: Request):
     """
     Validate input text against security rules.
     """
-    from guardrails_config import validate_input
-    from agent import get_agent
-    
     # Use the same validation logic as the agent
     is_safe, reason = validate_input(request.text)
-    
+
     if not is_safe:
-        # We should also log this here since the backend is asking
-        try:
-            # We can use the agent instance to reuse logging logic if we refactor,
-            # but for now let's just log it directly or assume the caller handles strict logging if needed.
-            # actually, let's log it here to ensure "Agent Service" is doing the work.
-            import requests
-            # Log to Backend Security Audit (recursion? No, backend called us, we call backend logs)
-            # To avoid potential loop complexity or double logging, we'll just return the decision 
-            # and let the caller (Backend) or this service log it.
-            # User requirement: "Agent Service Integration... log violations". 
-            # So WE should log it.
-            backend_url = os.getenv("BACKEND_URL", "http://backend:8000")
-            requests.post(
-                f"{backend_url}/api/security/audit/",
-                json={
-                    "source": "Agent Service (Validation API)",
-                    "input_content": request.text,
-                    "violation_type": "jailbreak", 
-                    "action_taken": "blocked",
-                    "metadata": {"reason": reason}
-                },
-                timeout=5
-            )
-        except Exception as e:
-            logger.error(f"Failed to audit log violation: {e}")
+        # Log to Backend Security Audit in the background so the response never waits on it
+        _enqueue_audit(http_request.app, {
+            "source": "Agent Service (Validation API)",
+            "input_content": request.text,
+            "violation_type": "jailbreak",
+            "action_taken": "blocked",
+            "metadata": {"reason": reason}
+        })
 
     return ValidationResponse(is_safe=is_safe, reason=reason)
 
 # Direct tool execution endpoint
 @app.post("/api/tools/execute", response_model=ToolExecutionResponse)
-async def execute_tool(request: ToolExecutionRequest):
+async def execute_tool(request: ToolExecutionRequest, http_request: Request):
     """
     Directly execute an MCP tool
 
@@ -190,18 +332,16 @@ async def execute_tool(request: ToolExecutionRequest):
     - search_knowledge
     - add_learning_entry
     - get_progress_stats
+    - bulk_query
     """
     try:
         logger.info(f"Tool execution: {request.tool_name} with args {request.arguments}")
 
-        # Import agent (lazy load)
-        from agent import get_agent
-
-        # Get agent instance
-        agent = get_agent()
+        # Get agent instance (created at startup)
+        agent = _resolve_agent(http_request.app)
 
         # Execute tool
-        result = agent.execute_tool(request.tool_name, request.arguments)
+        result = await agent.execute_tool(request.tool_name, request.arguments)
 
         if not result.get("success", False):
             raise HTTPException(status_code=400, detail=result.get("error", "Unknown error"))
@@ -209,7 +349,7 @@ async def execute_tool(request: ToolExecutionRequest):
         return ToolExecutionResponse(
             success=True,
             result=result,
-            timestamp=datetime.utcnow().isoformat()
+            timestamp=utcnow_iso()
         )
 
     except Exception as e:
@@ -241,6 +381,10 @@ async def list_tools():
             {
                 "name": "get_progress_stats",
                 "description": "Get portfolio progress statistics and metrics"
+            },
+            {
+                "name": "bulk_query",
+                "description": "Run several read-only tools concurrently in one step"
             }
         ]
     }
@@ -251,6 +395,54 @@ class MetricsResponse(BaseModel):
     context_precision: float
     timestamp: str
 
+# Ragas score columns averaged by /metrics
+METRIC_COLUMNS = ("faithfulness", "answer_relevancy", "context_precision")
+
+# Last parsed report, keyed on (absolute path, mtime) so scrapes skip re-parsing
+_metrics_cache: Optional[Tuple[Tuple[str, float], MetricsResponse]] = None
+
+def _read_metric_means(report_path: str) -> Dict[str, float]:
+    """
+    Average each metric column, skipping blank or non-numeric cells
+
+    Uses pandas when available; otherwise a single csv pass with running
+    sums/counts, so memory stays O(1) regardless of report size.
+    """
+    means = {column: 0.0 for column in METRIC_COLUMNS}
+
+    try:
+        import pandas as pd
+    except ImportError:
+        pd = None
+
+    if pd is not None:
+        # C-level parse of just the score columns; missing columns are tolerated
+        df = pd.read_csv(report_path, usecols=lambda column: column in METRIC_COLUMNS)
+        if not df.empty:
+            # Unparseable cells become NaN and are skipped by mean()
+            for column, value in df.apply(pd.to_numeric, errors="coerce").mean().items():
+                if pd.notna(value):
+                    means[column] = float(value)
+        return means
+
+    import csv
+
+    sums = {column: 0.0 for column in METRIC_COLUMNS}
+    counts = {column: 0 for column in METRIC_COLUMNS}
+    with open(report_path, 'r', encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            for column in METRIC_COLUMNS:
+                try:
+                    sums[column] += float(row.get(column) or "")
+                    counts[column] += 1
+                except ValueError:
+                    continue
+
+    for column in METRIC_COLUMNS:
+        if counts[column]:
+            means[column] = sums[column] / counts[column]
+    return means
+
 @app.get("/metrics", response_model=MetricsResponse)
 async def get_metrics():
     """
@@ -258,63 +450,32 @@ async def get_metrics():
     
     Reads from the latest evaluation report (ragas_report.csv)
     """
-    import csv
-    import statistics
-    
+    global _metrics_cache
+
     report_path = "ragas_report.csv"
     
     # Default values if no report exists
-    metrics = {
-        "faithfulness": 0.0,
-        "answer_relevancy": 0.0,
-        "context_precision": 0.0
-    }
+    metrics = {column: 0.0 for column in METRIC_COLUMNS}
     
     if not os.path.exists(report_path):
         return MetricsResponse(
             **metrics,
-            timestamp=datetime.utcnow().isoformat()
+            timestamp=utcnow_iso()
         )
         
     try:
-        # Accumulators
-        faithfulness_scores = []
-        answer_relevancy_scores = []
-        context_precision_scores = []
-        
-        with open(report_path, 'r', encoding='utf-8') as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                # Helper to parse float safely
-                def parse_score(val):
-                    try:
-                        return float(val) if val and val.strip() != "" else None
-                    except ValueError:
-                        return None
-                
-                f_score = parse_score(row.get("faithfulness"))
-                a_score = parse_score(row.get("answer_relevancy"))
-                c_score = parse_score(row.get("context_precision"))
-                
-                if f_score is not None:
-                    faithfulness_scores.append(f_score)
-                if a_score is not None:
-                    answer_relevancy_scores.append(a_score)
-                if c_score is not None:
-                    context_precision_scores.append(c_score)
-        
-        # Calculate averages if data exists
-        if faithfulness_scores:
-            metrics["faithfulness"] = statistics.mean(faithfulness_scores)
-        if answer_relevancy_scores:
-            metrics["answer_relevancy"] = statistics.mean(answer_relevancy_scores)
-        if context_precision_scores:
-            metrics["context_precision"] = statistics.mean(context_precision_scores)
-            
-        return MetricsResponse(
+        cache_key = (os.path.abspath(report_path), os.path.getmtime(report_path))
+        if _metrics_cache and _metrics_cache[0] == cache_key:
+            return _metrics_cache[1]
+
+        metrics = _read_metric_means(report_path)
+
+        response = MetricsResponse(
             **metrics,
-            timestamp=datetime.utcfromtimestamp(os.path.getmtime(report_path)).isoformat()
+            timestamp=datetime.utcfromtimestamp(cache_key[1]).isoformat()
         )
+        _metrics_cache = (cache_key, response)
+        return response
         
     except Exception as e:
         logger.error(f"Error reading metrics: {e}")
@@ -323,5 +484,5 @@ async def get_metrics():
             faithfulness=0.0,
             answer_relevancy=0.0,
             context_precision=0.0,
-            timestamp=datetime.utcnow().isoformat()
+            timestamp=utcnow_iso()
         )
@@ -1,6 +1,7 @@
 import os
+import asyncio
 import logging
-from typing import List, Dict
+from typing import List, Dict, Tuple
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -12,6 +13,7 @@ logger = logging.getLogger(__name__)
 
 try:
     from ragas import evaluate
+    from ragas.run_config import RunConfig
     from ragas.metrics import (
         faithfulness,
         answer_relevancy,
@@ -20,11 +22,67 @@ try:
     from datasets import Dataset
     from langchain_groq import ChatGroq
     from langchain_cohere import CohereEmbeddings
+    from pydantic import PrivateAttr
 except ImportError as e:
     logger.error(f"Failed to import Ragas dependencies: {e}")
     logger.error("Please ensure 'ragas', 'datasets', and 'langchain-cohere' are installed.")
     exit(1)
 
+# Cohere's embed endpoint accepts at most 96 texts per request
+COHERE_MAX_BATCH = 96
+
+class BatchedCohereEmbeddings(CohereEmbeddings):
+    """
+    CohereEmbeddings with a per-run vector cache.
+
+    Texts are embedded in chunks of up to COHERE_MAX_BATCH per request and cached,
+    so prime() can pre-embed the whole dataset before ragas starts scoring and the
+    per-row metric calls become cache hits.
+    """
+
+    _vectors: Dict[Tuple[str, str], List[float]] = PrivateAttr(default_factory=dict)
+
+    def prime(self, texts: List[str], input_type: str = "search_query") -> None:
+        """Embed any uncached texts in batched requests."""
+        self._lookup(texts, input_type)
+
+    def _lookup(self, texts: List[str], input_type: str) -> List[List[float]]:
+        missing = list(dict.fromkeys(t for t in texts if (input_type, t) not in self._vectors))
+        for start in range(0, len(missing), COHERE_MAX_BATCH):
+            chunk = missing[start:start + COHERE_MAX_BATCH]
+            vectors = self.embed(chunk, input_type=input_type)
+            self._vectors.update(((input_type, text), vec) for text, vec in zip(chunk, vectors, strict=True))
+        return [self._vectors[(input_type, t)] for t in texts]
+
+    async def _alookup(self, texts: List[str], input_type: str) -> List[List[float]]:
+        missing = list(dict.fromkeys(t for t in texts if (input_type, t) not in self._vectors))
+        chunks = [missing[i:i + COHERE_MAX_BATCH] for i in range(0, len(missing), COHERE_MAX_BATCH)]
+        results = await asyncio.gather(*(self.aembed(c, input_type=input_type) for c in chunks))
+        for chunk, vectors in zip(chunks, results, strict=True):
+            self._vectors.update(((input_type, text), vec) for text, vec in zip(chunk, vectors, strict=True))
+        return [self._vectors[(input_type, t)] for t in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._lookup([text], "search_query")[0]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self._lookup(texts, "search_document")
+
+    async def aembed_query(self, text: str) -> List[float]:
+        return (await self._alookup([text], "search_query"))[0]
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        return await self._alookup(texts, "search_document")
+
+def generate_answers(questions: List[str]) -> List[str]:
+    """
+    Answer all evaluation questions with the live agent in one concurrent batch.
+    """
+    from agent import get_agent
+
+    results = asyncio.run(get_agent().chat_batch(questions))
+    return [result.get("response", "") for result in results]
+
 def run_evaluation():
     """
     Run Ragas evaluation on a sample dataset using Groq LLM and Cohere embeddings.
@@ -49,7 +107,7 @@ def run_evaluation():
     if not cohere_api_key:
         raise ValueError("COHERE_API_KEY not found in environment")
     
-    embeddings = CohereEmbeddings(
+    embeddings = BatchedCohereEmbeddings(
         cohere_api_key=cohere_api_key,
         model="embed-english-v3.0"
     )
@@ -80,7 +138,16 @@ def run_evaluation():
         ]
     }
 
+    # Optionally replace the canned answers with live agent output
+    if os.getenv("EVAL_LIVE_ANSWERS", "false").lower() == "true":
+        logger.info("Generating answers with the live agent...")
+        data['answer'] = generate_answers(data['question'])
+
     dataset = Dataset.from_dict(data)
+
+    # Pre-embed the questions in one batched call; answer_relevancy compares
+    # every row's question against its generated questions
+    embeddings.prime(data['question'])
     logger.info(f"Created dataset with {len(data['question'])} samples")
 
     # 4. Run Evaluation
@@ -96,11 +163,18 @@ def run_evaluation():
         context_precision,
     ]
 
+    # Fan judge calls out concurrently; keep RAGAS_WORKERS under Groq's RPM cap
+    run_config = RunConfig(
+        max_workers=int(os.getenv("RAGAS_WORKERS", "16")),
+        max_wait=60
+    )
+
     results = evaluate(
         dataset=dataset,
         metrics=metrics,
         llm=llm,
-        embeddings=embeddings
+        embeddings=embeddings,
+        run_config=run_config
     )
 
     # 5. Output Results
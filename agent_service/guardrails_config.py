@@ -1,6 +1,8 @@
 # from guardrails import Guard
 # from guardrails.hub import CompetitorCheck
 import os
+import re
+from functools import lru_cache
 
 # Note: In a real production environment, we would use more sophisticated validators.
 # For this "showcase", we will use a simple custom validator or regex-based approach
@@ -28,14 +30,47 @@ class SimpleJailbreakCheck:
             "ignore previous instructions",
             "system override"
         ]
+        # Single case-insensitive alternation: one pass, no lowercased copy of the input
+        self._pattern = re.compile(
+            "|".join(re.escape(term) for term in self.blocked_terms),
+            re.IGNORECASE
+        )
 
     def validate(self, text):
-        lower_text = text.lower()
-        for term in self.blocked_terms:
-            if term in lower_text:
-                return False, f"Content contains blocked term: {term}"
+        match = self._pattern.search(text)
+        if match:
+            return False, f"Content contains blocked term: {match.group(0).lower()}"
         return True, "Safe"
 
+# Built once at import; validate_input only runs the scan
+_JAILBREAK_CHECK = SimpleJailbreakCheck()
+
+# Only short prompts are memoized so the cache never pins large inputs in memory
+_CACHE_MAX_TEXT_LEN = 2048
+
+
+def _validate(text: str) -> tuple[bool, str]:
+    """
+    Run the content checks on non-empty text.
+    """
+    # Simple Jailbreak/Harmful content check
+    # In production, use: guard = Guard.from_rail(...) or Guard().use(CompetitorCheck...)
+    is_safe, reason = _JAILBREAK_CHECK.validate(text)
+
+    if not is_safe:
+        return False, reason
+
+    return True, "Safe"
+
+
+@lru_cache(maxsize=4096)
+def _validate_cached(text: str) -> tuple[bool, str]:
+    """
+    Memoized _validate for repeated prompts (health pings, UI revalidation).
+    """
+    return _validate(text)
+
+
 def validate_input(text: str) -> tuple[bool, str]:
     """
     Validate input text against security rules.
@@ -45,12 +80,7 @@ def validate_input(text: str) -> tuple[bool, str]:
     if not text or not text.strip():
         return True, "Empty input"
 
-    # 2. Simple Jailbreak/Harmful content check
-    # In production, use: guard = Guard.from_rail(...) or Guard().use(CompetitorCheck...)
-    jailbreak_check = SimpleJailbreakCheck()
-    is_safe, reason = jailbreak_check.validate(text)
-    
-    if not is_safe:
-        return False, reason
-
-    return True, "Safe"
+    # 2. Content checks (cached for short, frequently repeated prompts)
+    if len(text) <= _CACHE_MAX_TEXT_LEN:
+        return _validate_cached(text)
+    return _validate(text)
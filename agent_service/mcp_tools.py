@@ -3,18 +3,34 @@ MCP (Model Context Protocol) Tools Integration
 Wraps MCP server tools for LangChain agent usage
 """
 import os
-import json
+import asyncio
 import logging
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Tuple, Union
 
 import httpx
+import orjson
 from langchain.tools import StructuredTool
-from pydantic import BaseModel, Field
+from tenacity import AsyncRetrying, retry_if_exception, stop_after_attempt, wait_exponential_jitter
+from pydantic import BaseModel, ConfigDict, Field
+
+from memory import SemanticCache
 
 logger = logging.getLogger(__name__)
 
 # Backend URL from environment
 BACKEND_URL = os.getenv("BACKEND_URL", "http://localhost:8000")
+# Keep-alive pool shared by every tool call made through one executor
+HTTP_LIMITS = httpx.Limits(max_connections=64, max_keepalive_connections=32, keepalive_expiry=30.0)
+# Fail fast on an unreachable backend while still allowing slow RAG queries
+HTTP_TIMEOUT = httpx.Timeout(30.0, connect=5.0)
+# Attempts per idempotent backend call; only throttling, 5xx and network errors are retried
+BACKEND_MAX_ATTEMPTS = 3
+RETRYABLE_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+# Near-paraphrase search queries at or above this cosine similarity reuse a cached result
+SEARCH_CACHE_THRESHOLD = float(os.getenv("SEARCH_CACHE_THRESHOLD", "0.92"))
+# Read-only tools that bulk_query may fan out, and how many run at once
+BULK_TOOLS = frozenset({"get_roadmap", "get_learning_entries", "search_knowledge", "get_progress_stats"})
+BULK_CALL_CONCURRENCY = 10
 # Enable mock mode for testing
 USE_MOCK = os.getenv("USE_MOCK_BACKEND", "false").lower() == "true"
 
@@ -23,6 +39,21 @@ if USE_MOCK:
     logger.info("Using MOCK backend for testing")
 
 
+def _is_retryable(exc: BaseException) -> bool:
+    """Whether a backend error is transient and worth retrying"""
+    if isinstance(exc, httpx.HTTPStatusError):
+        return exc.response.status_code in RETRYABLE_STATUS_CODES
+    return isinstance(exc, httpx.TransportError)
+
+
+def _dumps(result: Union[Dict[str, Any], bytes]) -> str:
+    """Serialize a tool result as compact JSON for the LLM prompt"""
+    if isinstance(result, bytes):
+        # Already-serialized mock response
+        return result.decode()
+    return orjson.dumps(result).decode()
+
+
 class MCPToolExecutor:
     """
     Executes MCP tools by calling the backend Django API
@@ -36,10 +67,45 @@ class MCPToolExecutor:
             backend_url: URL of the Django backend service
         """
         self.backend_url = backend_url
-        self.client = httpx.Client(timeout=30.0)
+        # One pooled client for all tools, created on first use inside the running loop
+        self._client: Optional[httpx.AsyncClient] = None
+        self._tools: Optional[List[StructuredTool]] = None
+        self._query_embeddings = None
+        self.search_cache: Optional[SemanticCache] = None
+        cohere_api_key = os.getenv("COHERE_API_KEY")
+        if cohere_api_key:
+            from langchain_cohere import CohereEmbeddings
+
+            self._query_embeddings = CohereEmbeddings(
+                cohere_api_key=cohere_api_key,
+                model=os.getenv("COHERE_EMBED_MODEL", "embed-english-v3.0")
+            )
+            self.search_cache = SemanticCache(threshold=SEARCH_CACHE_THRESHOLD)
         logger.info(f"MCPToolExecutor initialized with backend: {backend_url}")
 
-    def _call_backend(self, endpoint: str, method: str = "GET", data: Optional[Dict] = None) -> Dict[str, Any]:
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """Shared async client, so concurrent tool calls reuse warm connections"""
+        if self._client is None:
+            # HTTP/2 is negotiated over TLS; plain-http backends stay on keep-alive HTTP/1.1
+            transport = httpx.AsyncHTTPTransport(http2=True, limits=HTTP_LIMITS, retries=2)
+            self._client = httpx.AsyncClient(base_url=self.backend_url, timeout=HTTP_TIMEOUT, transport=transport)
+        return self._client
+
+    async def aclose(self) -> None:
+        """Close pooled backend connections"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def _call_backend(
+        self,
+        endpoint: str,
+        method: str = "GET",
+        data: Optional[Dict] = None,
+        params: Optional[Dict[str, Any]] = None,
+        idempotent: bool = True
+    ) -> Union[Dict[str, Any], bytes]:
         """
         Call Django backend API (or mock for testing)
 
@@ -47,41 +113,55 @@ class MCPToolExecutor:
             endpoint: API endpoint path
             method: HTTP method
             data: Request data for POST requests
+            params: Query parameters
+            idempotent: Retry transient failures (disable for writes)
 
         Returns:
-            Response data as dictionary
+            Response data as dictionary (static mocks return pre-serialized JSON bytes)
         """
         # Use mock data if enabled
         if USE_MOCK:
             logger.info(f"Mock call: {method} {endpoint}")
-            return get_mock_data(endpoint, method, data)
+            return get_mock_data(endpoint, method, data, params)
 
         url = f"{self.backend_url}{endpoint}"
 
-        try:
-            if method == "GET":
-                response = self.client.get(url)
-            elif method == "POST":
-                response = self.client.post(url, json=data)
-            else:
-                raise ValueError(f"Unsupported HTTP method: {method}")
-
-            response.raise_for_status()
-            return response.json()
+        if method not in ("GET", "POST"):
+            raise ValueError(f"Unsupported HTTP method: {method}")
 
+        try:
+            async for attempt in AsyncRetrying(
+                retry=retry_if_exception(_is_retryable),
+                stop=stop_after_attempt(BACKEND_MAX_ATTEMPTS if idempotent else 1),
+                wait=wait_exponential_jitter(initial=0.1, max=2.0),
+                reraise=True
+            ):
+                with attempt:
+                    response = await self.client.request(
+                        method,
+                        endpoint,
+                        params=params,
+                        json=data if method == "POST" else None
+                    )
+                    response.raise_for_status()
+            return orjson.loads(response.content)
+
+        except httpx.HTTPStatusError as e:
+            logger.error(f"HTTP error calling {url}: {e}")
+            return {"success": False, "error": str(e), "status_code": e.response.status_code}
         except httpx.HTTPError as e:
             logger.error(f"HTTP error calling {url}: {e}")
             return {"success": False, "error": str(e)}
-        except Exception as e:
-            logger.error(f"Error calling {url}: {e}")
-            return {"success": False, "error": str(e)}
+        except orjson.JSONDecodeError as e:
+            logger.error(f"Invalid JSON from {url}: {e}")
+            return {"success": False, "error": f"Invalid JSON response: {e}"}
 
-    def get_roadmap(self) -> str:
+    async def get_roadmap(self) -> str:
         """Get the complete AI Career Roadmap"""
-        result = self._call_backend("/api/roadmap/sections/")
-        return json.dumps(result, indent=2)
+        result = await self._call_backend("/api/roadmap/sections/")
+        return _dumps(result)
 
-    def get_learning_entries(self, roadmap_item_id: Optional[int] = None, limit: int = 10) -> str:
+    async def get_learning_entries(self, roadmap_item_id: Optional[int] = None, limit: int = 10) -> str:
         """
         Get learning log entries
 
@@ -89,14 +169,14 @@ class MCPToolExecutor:
             roadmap_item_id: Optional filter by roadmap item ID
             limit: Maximum number of entries to return
         """
-        endpoint = f"/api/roadmap/learning-entries/?limit={limit}"
+        params = {"limit": limit}
         if roadmap_item_id:
-            endpoint += f"&roadmap_item={roadmap_item_id}"
+            params["roadmap_item"] = roadmap_item_id
 
-        result = self._call_backend(endpoint)
-        return json.dumps(result, indent=2)
+        result = await self._call_backend("/api/roadmap/learning-entries/", params=params)
+        return _dumps(result)
 
-    def search_knowledge(self, query: str, top_k: int = 5) -> str:
+    async def search_knowledge(self, query: str, top_k: int = 5) -> str:
         """
         Semantic search across all portfolio knowledge
 
@@ -104,14 +184,29 @@ class MCPToolExecutor:
             query: Search query
             top_k: Number of results to return
         """
-        result = self._call_backend(
-            "/api/rag/search/",
-            method="POST",
-            data={"query": query, "top_k": top_k}
-        )
-        return json.dumps(result, indent=2)
-
-    def add_learning_entry(
+        vector = None
+        if self.search_cache is not None:
+            try:
+                vector = await self._query_embeddings.aembed_query(query)
+            except Exception as e:
+                logger.warning(f"Search cache embedding failed, querying backend: {e}")
+            if vector is not None:
+                cached = self.search_cache.get(vector, scope=str(top_k))
+                if cached is not None:
+                    logger.info(f"Search cache hit for query: {query}")
+                    return cached
+
+        data = {"query": query, "top_k": top_k}
+        if vector is not None:
+            # Same model as the backend, so it can skip embedding the query again
+            data["query_vector"] = vector
+        result = await self._call_backend("/api/rag/search/", method="POST", data=data)
+        output = _dumps(result)
+        if vector is not None and isinstance(result, dict) and result.get("success", True):
+            self.search_cache.add(vector, output, scope=str(top_k))
+        return output
+
+    async def add_learning_entry(
         self,
         title: str,
         content: str,
@@ -135,53 +230,159 @@ class MCPToolExecutor:
         if roadmap_item_id:
             data["roadmap_item"] = roadmap_item_id
 
-        result = self._call_backend(
+        result = await self._call_backend(
             "/api/roadmap/learning-entries/",
             method="POST",
-            data=data
+            data=data,
+            idempotent=False
         )
-        return json.dumps(result, indent=2)
+        return _dumps(result)
 
-    def get_progress_stats(self) -> str:
+    async def get_progress_stats(self) -> str:
         """Get portfolio progress statistics and metrics"""
-        result = self._call_backend("/api/roadmap/progress/")
-        return json.dumps(result, indent=2)
+        result = await self._call_backend("/api/roadmap/progress/")
+        return _dumps(result)
+
+    async def bulk_call(self, calls: List[Tuple[str, Dict[str, Any]]]) -> List[str]:
+        """
+        Run several read-only tools concurrently
+
+        Args:
+            calls: (tool name, keyword arguments) pairs
+
+        Returns:
+            One JSON result per call, in order (failures become error results)
+        """
+        semaphore = asyncio.Semaphore(BULK_CALL_CONCURRENCY)
+
+        async def run(name: str, kwargs: Dict[str, Any]) -> str:
+            if name not in BULK_TOOLS:
+                return _dumps({"success": False, "error": f"Tool '{name}' cannot be bulk-called"})
+            async with semaphore:
+                try:
+                    return await getattr(self, name)(**kwargs)
+                except Exception as e:
+                    logger.error(f"Bulk call {name} failed: {e}")
+                    return _dumps({"success": False, "error": str(e)})
+
+        return await asyncio.gather(*(run(name, kwargs) for name, kwargs in calls))
+
+    async def bulk_query(self, calls: str) -> str:
+        """
+        Run several read-only tools in one step
+
+        Args:
+            calls: JSON list of {"tool": name, "args": {...}} objects, or
+                comma-separated tool names to call with default arguments
+        """
+        try:
+            parsed = orjson.loads(calls)
+            if not isinstance(parsed, list):
+                raise ValueError("calls must be a list")
+            pairs = [(call["tool"], call.get("args") or {}) for call in parsed]
+        except orjson.JSONDecodeError:
+            pairs = [(name.strip(), {}) for name in calls.split(",") if name.strip()]
+        except (KeyError, TypeError, ValueError) as e:
+            return _dumps({"success": False, "error": f"Invalid bulk_query input: {e}"})
+
+        results = await self.bulk_call(pairs)
+        # Results are already JSON; embed them without re-parsing
+        return _dumps({
+            "success": True,
+            "results": [
+                {"tool": name, "result": orjson.Fragment(result)}
+                for (name, _), result in zip(pairs, results, strict=True)
+            ]
+        })
+
+
+# Pydantic models for tool inputs (immutable, unknown arguments rejected)
+TOOL_INPUT_CONFIG = ConfigDict(extra="forbid", frozen=True)
 
 
-# Pydantic models for tool inputs
 class SearchKnowledgeInput(BaseModel):
+    model_config = TOOL_INPUT_CONFIG
+
     query: str = Field(..., description="Search query for semantic knowledge search")
     top_k: int = Field(5, description="Number of results to return (default: 5)")
 
 
 class AddLearningEntryInput(BaseModel):
+    model_config = TOOL_INPUT_CONFIG
+
     title: str = Field(..., description="Title of the learning entry")
     content: str = Field(..., description="Detailed content of what was learned")
-    roadmap_item_id: Optional[int] = Field(None, description="Optional roadmap item ID to link to")
+    roadmap_item_id: int | None = Field(None, description="Optional roadmap item ID to link to")
     is_public: bool = Field(True, description="Whether the entry is public (default: True)")
 
 
 class GetLearningEntriesInput(BaseModel):
-    roadmap_item_id: Optional[int] = Field(None, description="Optional roadmap item ID to filter by")
+    model_config = TOOL_INPUT_CONFIG
+
+    roadmap_item_id: int | None = Field(None, description="Optional roadmap item ID to filter by")
     limit: int = Field(10, description="Maximum number of entries to return (default: 10)")
 
 
+class BulkQueryInput(BaseModel):
+    model_config = TOOL_INPUT_CONFIG
+
+    calls: str = Field(
+        ...,
+        description=(
+            'Comma-separated tool names (e.g. "get_progress_stats, get_roadmap") or a JSON list '
+            'like [{"tool": "search_knowledge", "args": {"query": "transformers"}}]'
+        )
+    )
+
+
+# Resolve validators once at import instead of on first tool call
+for _model in (SearchKnowledgeInput, AddLearningEntryInput, GetLearningEntriesInput, BulkQueryInput):
+    _model.model_rebuild()
+
+
+# Shared executor instance
+_default_executor: Optional[MCPToolExecutor] = None
+
+
+def get_default_executor() -> MCPToolExecutor:
+    """
+    Get or create the shared MCPToolExecutor instance
+
+    Returns:
+        MCPToolExecutor instance
+    """
+    global _default_executor
+    if _default_executor is None:
+        _default_executor = MCPToolExecutor()
+    return _default_executor
+
+
 def create_langchain_tools(executor: Optional[MCPToolExecutor] = None) -> List[StructuredTool]:
     """
     Create LangChain StructuredTool instances from MCP tools
 
+    Tools are built once per executor and reused on later calls.
+
     Args:
-        executor: MCPToolExecutor instance (creates new one if not provided)
+        executor: MCPToolExecutor instance (uses the shared one if not provided)
 
     Returns:
         List of LangChain StructuredTool instances
     """
     if executor is None:
-        executor = MCPToolExecutor()
+        executor = get_default_executor()
 
+    # Cached on the executor, since the tools' bound methods keep it alive anyway
+    if executor._tools is None:
+        executor._tools = _build_tools(executor)
+    return list(executor._tools)
+
+
+def _build_tools(executor: MCPToolExecutor) -> List[StructuredTool]:
+    """Build the StructuredTool wrappers around an executor's methods"""
     tools = [
         StructuredTool.from_function(
-            func=executor.get_roadmap,
+            coroutine=executor.get_roadmap,
             name="get_roadmap",
             description=(
                 "Get the complete AI Career Roadmap with all sections and items. "
@@ -190,7 +391,7 @@ def create_langchain_tools(executor: Optional[MCPToolExecutor] = None) -> List[S
             )
         ),
         StructuredTool.from_function(
-            func=executor.get_learning_entries,
+            coroutine=executor.get_learning_entries,
             name="get_learning_entries",
             description=(
                 "Get learning log entries, optionally filtered by roadmap item. "
@@ -200,7 +401,7 @@ def create_langchain_tools(executor: Optional[MCPToolExecutor] = None) -> List[S
             args_schema=GetLearningEntriesInput
         ),
         StructuredTool.from_function(
-            func=executor.search_knowledge,
+            coroutine=executor.search_knowledge,
             name="search_knowledge",
             description=(
                 "Perform semantic search across all portfolio knowledge using RAG. "
@@ -210,7 +411,7 @@ def create_langchain_tools(executor: Optional[MCPToolExecutor] = None) -> List[S
             args_schema=SearchKnowledgeInput
         ),
         StructuredTool.from_function(
-            func=executor.add_learning_entry,
+            coroutine=executor.add_learning_entry,
             name="add_learning_entry",
             description=(
                 "Create a new learning log entry. "
@@ -220,7 +421,7 @@ def create_langchain_tools(executor: Optional[MCPToolExecutor] = None) -> List[S
             args_schema=AddLearningEntryInput
         ),
         StructuredTool.from_function(
-            func=executor.get_progress_stats,
+            coroutine=executor.get_progress_stats,
             name="get_progress_stats",
             description=(
                 "Get portfolio progress statistics and metrics. "
@@ -228,6 +429,17 @@ def create_langchain_tools(executor: Optional[MCPToolExecutor] = None) -> List[S
                 "and knowledge base statistics. Returns comprehensive progress data."
             )
         ),
+        StructuredTool.from_function(
+            coroutine=executor.bulk_query,
+            name="bulk_query",
+            description=(
+                "Run several read-only tools (get_roadmap, get_learning_entries, "
+                "search_knowledge, get_progress_stats) concurrently in one step. "
+                "Prefer this over separate calls when an answer needs more than one of them. "
+                "Returns each tool's result in order."
+            ),
+            args_schema=BulkQueryInput
+        ),
     ]
 
     logger.info(f"Created {len(tools)} LangChain tools from MCP server")
@@ -3,16 +3,54 @@ Conversation memory management using Redis
 Stores conversation history for context-aware agent responses
 """
 import os
-import json
+import time
 import logging
-from typing import List, Dict, Optional
-from datetime import datetime, timedelta
+from typing import List, Dict, Optional, Tuple
 
-import redis
+import msgpack
+import numpy as np
+import orjson
+from redis.asyncio import Redis
 from redis.exceptions import RedisError
 
+from timeutils import utcnow_iso
+
 logger = logging.getLogger(__name__)
 
+# Conversations (and their summaries) expire after 7 days
+CONVERSATION_TTL_SECONDS = 60 * 60 * 24 * 7
+# History is capped at this many messages; older ones live on in the rolling summary
+MAX_HISTORY_MESSAGES = 200
+# Trim only after this many extra messages, so summary offsets are rewritten rarely
+HISTORY_TRIM_SLACK = 50
+# Set of live conversation IDs, so listing never scans the keyspace
+CONVERSATION_INDEX_KEY = "conversations:index"
+# Running count of stored messages (adds minus trims/clears; TTL expiry is not subtracted)
+MESSAGE_COUNT_KEY = "stats:total_messages"
+# Line prefix per message role in formatted context
+_ROLE_PREFIX = {"user": "User: ", "assistant": "Assistant: ", "system": "System: "}
+
+
+def _pack_message(message: Dict) -> bytes:
+    """Encode a message for the Redis history list"""
+    return msgpack.packb(message, use_bin_type=True)
+
+
+def _unpack_message(raw: bytes) -> Dict:
+    """Decode a stored message (msgpack, or JSON written by older versions)"""
+    # A msgpack map never starts with "{", so the legacy JSON blobs are unambiguous
+    if raw[:1] == b"{":
+        return orjson.loads(raw)
+    return msgpack.unpackb(raw, raw=False)
+
+
+def _format_messages(history: List[Dict]) -> str:
+    """Format messages as "Role: content" lines"""
+    return "\n".join(
+        f"{_ROLE_PREFIX.get(msg['role']) or msg['role'].capitalize() + ': '}{msg['content']}"
+        for msg in history
+    )
+
 
 class ConversationMemory:
     """
@@ -29,27 +67,51 @@ class ConversationMemory:
         """
         self.redis_url = redis_url or os.getenv("REDIS_URL", "redis://localhost:6379")
 
-        try:
-            self.redis_client = redis.from_url(
-                self.redis_url,
-                decode_responses=True,
-                socket_connect_timeout=5
-            )
-            # Test connection
-            self.redis_client.ping()
-            logger.info(f"Connected to Redis at {self.redis_url}")
-        except RedisError as e:
-            logger.error(f"Failed to connect to Redis: {e}")
-            # Fallback to in-memory storage
-            self.redis_client = None
-            self._memory_fallback = {}
-            logger.warning("Using in-memory fallback for conversation storage")
+        # Raw bytes: message blobs are msgpack; JSON values are parsed from bytes.
+        # The connection is tested lazily on first use, inside the running loop.
+        self.redis_client: Optional[Redis] = Redis.from_url(
+            self.redis_url,
+            decode_responses=False,
+            socket_connect_timeout=5
+        )
+        self._connection_checked = False
+        # Fallback to in-memory storage when Redis is unreachable
+        self._memory_fallback = {}
+        self._summary_fallback = {}
+        self._message_count_fallback = 0
+
+    async def _connected(self) -> bool:
+        """Whether Redis is in use; the first call tests the connection"""
+        if not self._connection_checked:
+            self._connection_checked = True
+            try:
+                await self.redis_client.ping()
+                logger.info(f"Connected to Redis at {self.redis_url}")
+            except RedisError as e:
+                logger.error(f"Failed to connect to Redis: {e}")
+                self.redis_client = None
+                logger.warning("Using in-memory fallback for conversation storage")
+        return self.redis_client is not None
+
+    async def aclose(self) -> None:
+        """Close pooled Redis connections"""
+        if self.redis_client is not None:
+            await self.redis_client.aclose()
 
     def _get_key(self, conversation_id: str) -> str:
         """Generate Redis key for conversation"""
         return f"conversation:{conversation_id}"
 
-    def add_message(
+    def _get_summary_key(self, conversation_id: str) -> str:
+        """Generate Redis key for a conversation's rolling summary"""
+        # Deliberately outside the conversation:* namespace used for message lists
+        return f"conversation_summary:{conversation_id}"
+
+    def _get_context_key(self, conversation_id: str) -> str:
+        """Generate Redis key for a conversation's pre-rendered compacted context"""
+        return f"conversation_context:{conversation_id}"
+
+    async def add_message(
         self,
         conversation_id: str,
         role: str,
@@ -68,28 +130,62 @@ class ConversationMemory:
         message = {
             "role": role,
             "content": content,
-            "timestamp": datetime.utcnow().isoformat(),
+            "timestamp": utcnow_iso(),
             "metadata": metadata or {}
         }
 
         key = self._get_key(conversation_id)
 
-        if self.redis_client:
+        if await self._connected():
             try:
-                # Append to list in Redis
-                self.redis_client.rpush(key, json.dumps(message))
-                # Set expiration to 7 days
-                self.redis_client.expire(key, 60 * 60 * 24 * 7)
+                # Append and refresh the 7-day expiry in one round-trip
+                pipe = self.redis_client.pipeline(transaction=False)
+                pipe.rpush(key, _pack_message(message))
+                pipe.expire(key, CONVERSATION_TTL_SECONDS)
+                pipe.sadd(CONVERSATION_INDEX_KEY, conversation_id)
+                pipe.incr(MESSAGE_COUNT_KEY)
+                length, _, _, _ = await pipe.execute()
                 logger.debug(f"Added message to conversation {conversation_id}")
             except RedisError as e:
                 logger.error(f"Redis error adding message: {e}")
+                return
         else:
             # Fallback to in-memory
             if conversation_id not in self._memory_fallback:
                 self._memory_fallback[conversation_id] = []
             self._memory_fallback[conversation_id].append(message)
+            self._message_count_fallback += 1
+            length = len(self._memory_fallback[conversation_id])
+
+        if length > MAX_HISTORY_MESSAGES + HISTORY_TRIM_SLACK:
+            await self._trim_history(conversation_id, length - MAX_HISTORY_MESSAGES)
 
-    def get_history(
+    async def _trim_history(self, conversation_id: str, drop: int) -> None:
+        """
+        Drop the oldest messages and shift the summary offset to match
+
+        Args:
+            conversation_id: Unique conversation identifier
+            drop: Number of leading messages to remove
+        """
+        if await self._connected():
+            try:
+                pipe = self.redis_client.pipeline(transaction=False)
+                pipe.ltrim(self._get_key(conversation_id), drop, -1)
+                pipe.decrby(MESSAGE_COUNT_KEY, drop)
+                await pipe.execute()
+            except RedisError as e:
+                logger.error(f"Redis error trimming history: {e}")
+                return
+        else:
+            del self._memory_fallback[conversation_id][:drop]
+            self._message_count_fallback -= drop
+
+        summary = await self.get_summary(conversation_id)
+        if summary["covered"]:
+            await self.set_summary(conversation_id, summary["summary"], max(summary["covered"] - drop, 0))
+
+    async def get_history(
         self,
         conversation_id: str,
         limit: Optional[int] = None
@@ -106,12 +202,12 @@ class ConversationMemory:
         """
         key = self._get_key(conversation_id)
 
-        if self.redis_client:
+        if await self._connected():
             try:
                 # Get messages from Redis
                 start = -limit if limit else 0
-                messages_json = self.redis_client.lrange(key, start, -1)
-                messages = [json.loads(msg) for msg in messages_json]
+                messages_raw = await self.redis_client.lrange(key, start, -1)
+                messages = [_unpack_message(msg) for msg in messages_raw]
                 logger.debug(f"Retrieved {len(messages)} messages for {conversation_id}")
                 return messages
             except RedisError as e:
@@ -124,7 +220,7 @@ class ConversationMemory:
                 messages = messages[-limit:]
             return messages
 
-    def get_context(
+    async def get_context(
         self,
         conversation_id: str,
         max_messages: int = 10
@@ -139,20 +235,163 @@ class ConversationMemory:
         Returns:
             Formatted context string
         """
-        history = self.get_history(conversation_id, limit=max_messages)
+        history = await self.get_history(conversation_id, limit=max_messages)
 
         if not history:
             return "No previous conversation context."
 
+        return f"Previous conversation:\n{_format_messages(history)}"
+
+    async def get_summary(self, conversation_id: str) -> Dict:
+        """
+        Get the rolling summary of older messages
+
+        Args:
+            conversation_id: Unique conversation identifier
+
+        Returns:
+            Dictionary with "summary" text and "covered" (number of leading
+            messages the summary replaces)
+        """
+        empty = {"summary": "", "covered": 0}
+
+        if await self._connected():
+            try:
+                raw = await self.redis_client.get(self._get_summary_key(conversation_id))
+                return orjson.loads(raw) if raw else empty
+            except RedisError as e:
+                logger.error(f"Redis error getting summary: {e}")
+                return empty
+        else:
+            return self._summary_fallback.get(conversation_id, empty)
+
+    async def set_summary(self, conversation_id: str, summary: str, covered: int) -> None:
+        """
+        Store the rolling summary of older messages
+
+        Args:
+            conversation_id: Unique conversation identifier
+            summary: Summary text
+            covered: Number of leading messages the summary replaces
+        """
+        record = {"summary": summary, "covered": covered}
+
+        if await self._connected():
+            try:
+                pipe = self.redis_client.pipeline(transaction=False)
+                pipe.set(
+                    self._get_summary_key(conversation_id),
+                    orjson.dumps(record),
+                    ex=CONVERSATION_TTL_SECONDS
+                )
+                # Rendered context still holds the old summary/tail split
+                pipe.delete(self._get_context_key(conversation_id))
+                await pipe.execute()
+            except RedisError as e:
+                logger.error(f"Redis error setting summary: {e}")
+        else:
+            self._summary_fallback[conversation_id] = record
+
+    async def _get_messages_from(self, conversation_id: str, start: int) -> List[Dict]:
+        """Retrieve messages from index start to the end of the conversation"""
+        if await self._connected():
+            try:
+                messages_raw = await self.redis_client.lrange(self._get_key(conversation_id), start, -1)
+                return [_unpack_message(msg) for msg in messages_raw]
+            except RedisError as e:
+                logger.error(f"Redis error getting history: {e}")
+                return []
+        else:
+            return self._memory_fallback.get(conversation_id, [])[start:]
+
+    async def get_compaction_candidates(
+        self,
+        conversation_id: str,
+        keep_recent: int = 2
+    ) -> Tuple[Dict, List[Dict]]:
+        """
+        Get older messages not yet folded into the rolling summary
+
+        Args:
+            conversation_id: Unique conversation identifier
+            keep_recent: Number of recent turns (user + assistant) kept verbatim
+
+        Returns:
+            Tuple of (current summary record, messages eligible for summarization)
+        """
+        summary = await self.get_summary(conversation_id)
+        messages = await self._get_messages_from(conversation_id, summary["covered"])
+        return summary, messages[:max(len(messages) - keep_recent * 2, 0)]
+
+    async def get_compacted_context(self, conversation_id: str) -> str:
+        """
+        Get conversation context as rolling summary + unsummarized messages
+
+        Older turns are replaced by their summary, so the prompt stays bounded
+        while recent turns (never summarized) remain verbatim. With Redis, the
+        rendered context is cached and served in one round-trip while it still
+        matches the history length.
+
+        Args:
+            conversation_id: Unique conversation identifier
+
+        Returns:
+            Formatted context string
+        """
+        if await self._connected():
+            try:
+                pipe = self.redis_client.pipeline(transaction=False)
+                pipe.get(self._get_context_key(conversation_id))
+                pipe.llen(self._get_key(conversation_id))
+                raw, length = await pipe.execute()
+                if raw:
+                    cached = orjson.loads(raw)
+                    if cached["length"] == length:
+                        return cached["text"]
+            except RedisError as e:
+                logger.error(f"Redis error getting cached context: {e}")
+        return await self.refresh_context(conversation_id)
+
+    async def refresh_context(self, conversation_id: str) -> str:
+        """
+        Render the compacted context and cache it for get_compacted_context
+
+        Args:
+            conversation_id: Unique conversation identifier
+
+        Returns:
+            Formatted context string
+        """
+        summary = await self.get_summary(conversation_id)
+        history = await self._get_messages_from(conversation_id, summary["covered"])
+        text = self._render_context(summary, history)
+
+        if await self._connected():
+            try:
+                await self.redis_client.set(
+                    self._get_context_key(conversation_id),
+                    orjson.dumps({"text": text, "length": summary["covered"] + len(history)}),
+                    ex=CONVERSATION_TTL_SECONDS
+                )
+            except RedisError as e:
+                logger.error(f"Redis error caching context: {e}")
+        return text
+
+    @staticmethod
+    def _render_context(summary: Dict, history: List[Dict]) -> str:
+        """Format a summary record and the messages after it"""
+        if not history and not summary["summary"]:
+            return "No previous conversation context."
+
         context_lines = ["Previous conversation:"]
-        for msg in history:
-            role = msg["role"].capitalize()
-            content = msg["content"]
-            context_lines.append(f"{role}: {content}")
+        if summary["summary"]:
+            context_lines.append(f"Summary of earlier messages: {summary['summary']}")
+        if history:
+            context_lines.append(_format_messages(history))
 
         return "\n".join(context_lines)
 
-    def clear_conversation(self, conversation_id: str) -> None:
+    async def clear_conversation(self, conversation_id: str) -> None:
         """
         Clear conversation history
 
@@ -161,38 +400,51 @@ class ConversationMemory:
         """
         key = self._get_key(conversation_id)
 
-        if self.redis_client:
+        if await self._connected():
             try:
-                self.redis_client.delete(key)
+                pipe = self.redis_client.pipeline(transaction=False)
+                pipe.llen(key)
+                pipe.srem(CONVERSATION_INDEX_KEY, conversation_id)
+                pipe.delete(
+                    key,
+                    self._get_summary_key(conversation_id),
+                    self._get_context_key(conversation_id)
+                )
+                length, _, _ = await pipe.execute()
+                if length:
+                    await self.redis_client.decrby(MESSAGE_COUNT_KEY, length)
                 logger.info(f"Cleared conversation {conversation_id}")
             except RedisError as e:
                 logger.error(f"Redis error clearing conversation: {e}")
         else:
             # Fallback to in-memory
-            self._memory_fallback.pop(conversation_id, None)
+            self._message_count_fallback -= len(self._memory_fallback.pop(conversation_id, []))
+            self._summary_fallback.pop(conversation_id, None)
 
-    def get_all_conversations(self) -> List[str]:
+    async def get_all_conversations(self) -> List[str]:
         """
         Get list of all active conversation IDs
 
         Returns:
             List of conversation IDs
         """
-        if self.redis_client:
+        if await self._connected():
             try:
-                # Scan for all conversation keys
-                keys = []
-                cursor = 0
-                while True:
-                    cursor, partial_keys = self.redis_client.scan(
-                        cursor, match="conversation:*", count=100
-                    )
-                    keys.extend(partial_keys)
-                    if cursor == 0:
-                        break
-                # Extract conversation IDs from keys
-                conversation_ids = [key.replace("conversation:", "") for key in keys]
-                return conversation_ids
+                conversation_ids = [
+                    member.decode() for member in await self.redis_client.smembers(CONVERSATION_INDEX_KEY)
+                ]
+                if not conversation_ids:
+                    return []
+
+                # Drop IDs whose history expired since they were indexed
+                pipe = self.redis_client.pipeline(transaction=False)
+                for conversation_id in conversation_ids:
+                    pipe.exists(self._get_key(conversation_id))
+                live = await pipe.execute()
+                expired = [cid for cid, exists in zip(conversation_ids, live, strict=True) if not exists]
+                if expired:
+                    await self.redis_client.srem(CONVERSATION_INDEX_KEY, *expired)
+                return [cid for cid, exists in zip(conversation_ids, live, strict=True) if exists]
             except RedisError as e:
                 logger.error(f"Redis error getting conversations: {e}")
                 return []
@@ -200,19 +452,26 @@ class ConversationMemory:
             # Fallback to in-memory
             return list(self._memory_fallback.keys())
 
-    def get_stats(self) -> Dict:
+    async def get_stats(self) -> Dict:
         """
         Get memory usage statistics
 
         Returns:
             Dictionary with memory stats
         """
-        if self.redis_client:
+        if await self._connected():
             try:
-                info = self.redis_client.info("memory")
+                # Counters only, in one round-trip; the index may still hold IDs
+                # that expired since get_all_conversations last pruned it
+                pipe = self.redis_client.pipeline(transaction=False)
+                pipe.scard(CONVERSATION_INDEX_KEY)
+                pipe.get(MESSAGE_COUNT_KEY)
+                pipe.info("memory")
+                total_conversations, total_messages, info = await pipe.execute()
                 return {
                     "used_memory_human": info.get("used_memory_human", "N/A"),
-                    "total_conversations": len(self.get_all_conversations()),
+                    "total_conversations": total_conversations,
+                    "total_messages": int(total_messages or 0),
                     "backend": "redis"
                 }
             except RedisError as e:
@@ -220,14 +479,96 @@ class ConversationMemory:
                 return {"backend": "redis", "error": str(e)}
         else:
             # Fallback to in-memory
-            total_messages = sum(len(msgs) for msgs in self._memory_fallback.values())
             return {
                 "total_conversations": len(self._memory_fallback),
-                "total_messages": total_messages,
+                "total_messages": self._message_count_fallback,
                 "backend": "in-memory (fallback)"
             }
 
 
+class SemanticCache:
+    """
+    In-process cache of tool results keyed on query embeddings
+    A lookup hits when a stored query of the same scope has cosine similarity
+    at or above the threshold, so near-paraphrases reuse one backend result
+    """
+
+    def __init__(
+        self,
+        threshold: float = 0.92,
+        ttl_seconds: int = 60 * 60 * 24,
+        max_entries: int = 512
+    ):
+        """
+        Initialize an empty cache
+
+        Args:
+            threshold: Minimum cosine similarity for a hit
+            ttl_seconds: Lifetime of each entry
+            max_entries: Oldest entries are evicted beyond this size
+        """
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._vectors: List[np.ndarray] = []
+        self._entries: List[Tuple[str, str, float]] = []  # (scope, value, expires_at)
+        self._matrix: Optional[np.ndarray] = None
+
+    @staticmethod
+    def _normalize(vector: List[float]) -> np.ndarray:
+        array = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(array)
+        return array / norm if norm else array
+
+    def _evict(self) -> None:
+        """Drop expired entries and trim to max_entries"""
+        now = time.monotonic()
+        keep = [i for i, entry in enumerate(self._entries) if entry[2] > now][-self.max_entries:]
+        if len(keep) != len(self._entries):
+            self._vectors = [self._vectors[i] for i in keep]
+            self._entries = [self._entries[i] for i in keep]
+            self._matrix = None
+
+    def get(self, vector: List[float], scope: str = "") -> Optional[str]:
+        """
+        Find the closest cached value for a query embedding
+
+        Args:
+            vector: Query embedding
+            scope: Only entries stored under the same scope can match
+
+        Returns:
+            Cached value, or None on a miss
+        """
+        self._evict()
+        if not self._entries:
+            return None
+        if self._matrix is None:
+            self._matrix = np.vstack(self._vectors)
+
+        scores = self._matrix @ self._normalize(vector)
+        for i in np.argsort(scores)[::-1]:
+            if scores[i] < self.threshold:
+                break
+            if self._entries[i][0] == scope:
+                return self._entries[i][1]
+        return None
+
+    def add(self, vector: List[float], value: str, scope: str = "") -> None:
+        """
+        Store a value under a query embedding
+
+        Args:
+            vector: Query embedding
+            value: Value to return for similar queries
+            scope: Partition key (e.g. tool arguments other than the query)
+        """
+        self._vectors.append(self._normalize(vector))
+        self._entries.append((scope, value, time.monotonic() + self.ttl_seconds))
+        self._matrix = None
+        self._evict()
+
+
 # Singleton instance
 _memory_instance: Optional[ConversationMemory] = None
 
@@ -1,8 +1,32 @@
 """
 Mock backend for testing agent service without real Django backend
 """
-import json
-from typing import Dict, Any, Optional
+from functools import lru_cache
+from typing import Any, Callable, Dict, Optional, Tuple, Union
+
+import orjson
+
+
+_LEARNING_ENTRIES = (
+    {
+        "id": 1,
+        "title": "Completed Neural Networks course",
+        "content": "Learned about feedforward networks, backpropagation, and gradient descent",
+        "roadmap_item": "Neural Networks Basics",
+        "roadmap_item_id": 1,
+        "is_public": True,
+        "created_at": "2025-12-01T10:00:00Z"
+    },
+    {
+        "id": 2,
+        "title": "Built a CNN for image classification",
+        "content": "Implemented ResNet-18 for CIFAR-10 dataset, achieved 92% accuracy",
+        "roadmap_item": "Deep Learning",
+        "roadmap_item_id": 2,
+        "is_public": True,
+        "created_at": "2025-12-03T15:30:00Z"
+    },
+)
 
 
 class MockBackend:
@@ -61,33 +85,15 @@ class MockBackend:
     @staticmethod
     def get_learning_entries(roadmap_item_id: Optional[int] = None, limit: int = 10) -> Dict[str, Any]:
         """Mock learning entries"""
-        entries = [
-            {
-                "id": 1,
-                "title": "Completed Neural Networks course",
-                "content": "Learned about feedforward networks, backpropagation, and gradient descent",
-                "roadmap_item": "Neural Networks Basics",
-                "is_public": True,
-                "created_at": "2025-12-01T10:00:00Z"
-            },
-            {
-                "id": 2,
-                "title": "Built a CNN for image classification",
-                "content": "Implemented ResNet-18 for CIFAR-10 dataset, achieved 92% accuracy",
-                "roadmap_item": "Deep Learning",
-                "is_public": True,
-                "created_at": "2025-12-03T15:30:00Z"
-            }
-        ]
-
-        # Filter by roadmap_item_id if provided
-        if roadmap_item_id:
-            entries = [e for e in entries if roadmap_item_id in [1, 2]][:limit]
+        entries = _LEARNING_ENTRIES
+        if roadmap_item_id is not None:
+            entries = tuple(e for e in entries if e["roadmap_item_id"] == roadmap_item_id)
 
+        page = list(entries[:limit])
         return {
             "success": True,
-            "entries": entries[:limit],
-            "count": len(entries[:limit])
+            "entries": page,
+            "count": len(page)
         }
 
     @staticmethod
@@ -174,7 +180,44 @@ class MockBackend:
         }
 
 
-def get_mock_data(endpoint: str, method: str = "GET", data: Optional[Dict] = None) -> Dict[str, Any]:
+_mock = MockBackend()
+
+# Static responses never change, so serialize them once at import
+ROADMAP_JSON = orjson.dumps(_mock.get_roadmap())
+PROGRESS_STATS_JSON = orjson.dumps(_mock.get_progress_stats())
+
+
+@lru_cache(maxsize=256)
+def _search_knowledge(query: str, top_k: int) -> Dict[str, Any]:
+    """Mock knowledge search, cached per (query, top_k)"""
+    return _mock.search_knowledge(query, top_k)
+
+
+# (method, path) -> handler(query params, request body)
+_ROUTES: Dict[Tuple[str, str], Callable[[Dict, Dict], Union[Dict[str, Any], bytes]]] = {
+    ("GET", "/api/roadmap/sections/"): lambda params, data: ROADMAP_JSON,
+    ("GET", "/api/roadmap/learning-entries/"): lambda params, data: _mock.get_learning_entries(
+        params.get("roadmap_item"), params.get("limit", 10)
+    ),
+    ("POST", "/api/roadmap/learning-entries/"): lambda params, data: _mock.add_learning_entry(
+        data.get("title", ""),
+        data.get("content", ""),
+        data.get("roadmap_item"),
+        data.get("is_public", True)
+    ),
+    ("POST", "/api/rag/search/"): lambda params, data: _search_knowledge(
+        data.get("query", ""), data.get("top_k", 5)
+    ),
+    ("GET", "/api/roadmap/progress/"): lambda params, data: PROGRESS_STATS_JSON,
+}
+
+
+def get_mock_data(
+    endpoint: str,
+    method: str = "GET",
+    data: Optional[Dict] = None,
+    params: Optional[Dict[str, Any]] = None
+) -> Union[Dict[str, Any], bytes]:
     """
     Get mock data for an endpoint
 
@@ -182,34 +225,13 @@ def get_mock_data(endpoint: str, method: str = "GET", data: Optional[Dict] = Non
         endpoint: API endpoint path
         method: HTTP method
         data: Request data
+        params: Query parameters
 
     Returns:
-        Mock response data
+        Mock response data (pre-serialized JSON bytes for static endpoints)
     """
-    mock = MockBackend()
-
-    # Route to appropriate mock method
-    if "/api/roadmap/sections/" in endpoint:
-        return mock.get_roadmap()
-    elif "/api/roadmap/learning-entries/" in endpoint:
-        # Parse query parameters from endpoint
-        roadmap_item_id = None
-        limit = 10
-        if "?" in endpoint:
-            params = endpoint.split("?")[1]
-            for param in params.split("&"):
-                if "=" in param:
-                    key, value = param.split("=")
-                    if key == "roadmap_item":
-                        roadmap_item_id = int(value)
-                    elif key == "limit":
-                        limit = int(value)
-        return mock.get_learning_entries(roadmap_item_id, limit)
-    elif "/api/rag/search/" in endpoint:
-        query = data.get("query", "") if data else ""
-        top_k = data.get("top_k", 5) if data else 5
-        return mock.search_knowledge(query, top_k)
-    elif "/api/roadmap/progress/" in endpoint:
-        return mock.get_progress_stats()
-    else:
+    path = endpoint if endpoint.endswith("/") else endpoint + "/"
+    handler = _ROUTES.get((method, path))
+    if handler is None:
         return {"success": False, "error": f"Mock endpoint not found: {endpoint}"}
+    return handler(params or {}, data or {})
@@ -3,41 +3,144 @@ Pytest configuration and fixtures for agent service tests
 """
 import pytest
 import os
+import sys
+import asyncio
+from types import MappingProxyType
+from typing import Any, NamedTuple
+import httpx
+import orjson
 from fastapi.testclient import TestClient
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def test_client():
-    """Returns a FastAPI test client"""
+    """Returns a FastAPI test client, started once per session"""
     from api import app
-    return TestClient(app)
+    with TestClient(app) as client:
+        yield client
+
+
+@pytest.fixture(autouse=True)
+def reset_app_state():
+    """Clears mutable API state between tests so the shared client stays clean"""
+    yield
+    # Only touch the API module if a test already imported it
+    api = sys.modules.get("api")
+    if api is not None:
+        api._metrics_cache = None
+
+
+def _freeze(obj):
+    """Recursively wraps dicts in MappingProxyType and lists in tuples"""
+    if isinstance(obj, dict):
+        return MappingProxyType({key: _freeze(value) for key, value in obj.items()})
+    if isinstance(obj, list):
+        return tuple(_freeze(item) for item in obj)
+    return obj
+
+
+def _thaw(obj):
+    """orjson default hook for frozen fixture mappings"""
+    if isinstance(obj, MappingProxyType):
+        return dict(obj)
+    raise TypeError
+
+
+class FakeResponse(NamedTuple):
+    """Plain canned response; turned into a fresh httpx.Response per request"""
+    status_code: int
+    body: Any = None
+    text: str = ""
+
+
+class MockBackendRoutes:
+    """Canned backend responses keyed by (method, path), plus the requests received"""
+
+    def __init__(self):
+        self.responses = {}
+        self.requests = []
+
+    def set(self, method, path, status_code, body=None, text=""):
+        """Register a JSON body (or plain text) for a route"""
+        self.responses[(method, path)] = FakeResponse(status_code, body, text)
+
+    def fail(self, method, path, exc):
+        """Make a route raise a transport-level exception"""
+        self.responses[(method, path)] = exc
+
+    def reset(self):
+        self.responses.clear()
+        self.requests.clear()
+
+    def handle(self, request):
+        self.requests.append(request)
+        response = self.responses.get((request.method, request.url.path))
+        if isinstance(response, Exception):
+            raise response
+        if response is None:
+            return httpx.Response(404, json={"detail": "Not found"})
+        if response.body is None:
+            return httpx.Response(response.status_code, text=response.text)
+        return httpx.Response(
+            response.status_code,
+            content=orjson.dumps(response.body, default=_thaw),
+            headers={"content-type": "application/json"}
+        )
+
+
+@pytest.fixture(scope="session")
+def backend_routes():
+    """Session-wide route registry behind the mocked backend transport"""
+    return MockBackendRoutes()
 
 
 @pytest.fixture
+def mock_backend(backend_routes):
+    """Returns the route registry, cleared after each test"""
+    yield backend_routes
+    backend_routes.reset()
+
+
+@pytest.fixture(scope="session")
+def mcp_executor(backend_routes, mock_backend_url):
+    """Returns an MCPToolExecutor whose HTTP client is served by backend_routes"""
+    from mcp_tools import MCPToolExecutor
+
+    executor = MCPToolExecutor(mock_backend_url)
+    executor.search_cache = None
+    executor._client = httpx.AsyncClient(
+        base_url=mock_backend_url,
+        transport=httpx.MockTransport(backend_routes.handle)
+    )
+    yield executor
+    asyncio.run(executor.aclose())
+
+
+@pytest.fixture(scope="session")
 def mock_backend_url():
     """Returns mock backend URL for testing"""
     return os.getenv("BACKEND_URL", "http://localhost:8000")
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def mock_redis_url():
     """Returns mock Redis URL for testing"""
     return os.getenv("REDIS_URL", "redis://localhost:6379")
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def sample_chat_request():
-    """Returns a sample chat request"""
-    return {
+    """Returns a sample chat request (read-only)"""
+    return _freeze({
         "message": "What is my learning progress?",
         "conversation_id": "test_conv_123"
-    }
+    })
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def sample_roadmap_data():
-    """Returns sample roadmap data"""
-    return [
+    """Returns sample roadmap data (read-only)"""
+    return _freeze([
         {
             "id": 1,
             "title": "Machine Learning Fundamentals",
@@ -53,13 +156,13 @@ def sample_roadmap_data():
                 }
             ]
         }
-    ]
+    ])
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def sample_learning_entries():
-    """Returns sample learning entries"""
-    return [
+    """Returns sample learning entries (read-only)"""
+    return _freeze([
         {
             "id": 1,
             "title": "Completed backpropagation tutorial",
@@ -71,13 +174,13 @@ def sample_learning_entries():
             "created_at": "2025-12-01T10:00:00Z",
             "is_public": True
         }
-    ]
+    ])
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def sample_progress_stats():
-    """Returns sample progress statistics"""
-    return {
+    """Returns sample progress statistics (read-only)"""
+    return _freeze({
         "success": True,
         "stats": {
             "roadmap": {
@@ -102,13 +205,13 @@ def sample_progress_stats():
                 }
             }
         }
-    }
+    })
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def sample_search_results():
-    """Returns sample knowledge search results"""
-    return {
+    """Returns sample knowledge search results (read-only)"""
+    return _freeze({
         "success": True,
         "query": "neural networks",
         "top_k": 3,
@@ -123,4 +226,4 @@ def sample_search_results():
                 "similarity": 0.85
             }
         ]
-    }
+    })
@@ -5,7 +5,6 @@ import pytest
 from unittest.mock import patch, MagicMock
 
 
-@pytest.mark.asyncio
 class TestHealthEndpoint:
     """Test health check endpoint"""
 
@@ -19,7 +18,6 @@ class TestHealthEndpoint:
         assert "timestamp" in data
 
 
-@pytest.mark.asyncio
 class TestChatEndpoint:
     """Test chat API endpoint"""
 
@@ -45,7 +43,7 @@ class TestChatEndpoint:
             "conversation_id": "test_conv_123"
         }
 
-        response = test_client.post("/api/chat", json=sample_chat_request)
+        response = test_client.post("/api/chat", json=dict(sample_chat_request))
 
         assert response.status_code == 200
         data = response.json()
@@ -62,7 +60,24 @@ class TestChatEndpoint:
             assert "conversation_id" in data
 
 
-@pytest.mark.asyncio
+class TestValidateEndpoint:
+    """Test prompt validation endpoint"""
+
+    def test_validate_whitespace_is_safe(self, test_client):
+        """Test POST /api/validate short-circuits blank input"""
+        response = test_client.post("/api/validate", json={"text": "   \n\t"})
+
+        assert response.status_code == 200
+        assert response.json() == {"is_safe": True, "reason": "Empty input"}
+
+    def test_validate_blocked_term(self, test_client):
+        """Test POST /api/validate flags blocked terms"""
+        response = test_client.post("/api/validate", json={"text": "System override now"})
+
+        assert response.status_code == 200
+        assert response.json()["is_safe"] is False
+
+
 class TestToolsEndpoint:
     """Test tools listing endpoint"""
 
@@ -97,3 +112,49 @@ class TestToolsEndpoint:
             assert "name" in tool
             assert "description" in tool
             # Optional: check for parameters field
+
+
+class TestMetricsEndpoint:
+    """Test Ragas metrics endpoint"""
+
+    def test_metrics_averages_report(self, test_client, tmp_path, monkeypatch):
+        """Test GET /metrics averages scores and skips blank cells"""
+        (tmp_path / "ragas_report.csv").write_text(
+            "user_input,faithfulness,answer_relevancy,context_precision\n"
+            "q1,1.0,0.5,\n"
+            "q2,0.5,,1.0\n"
+        )
+        monkeypatch.chdir(tmp_path)
+
+        response = test_client.get("/metrics")
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["faithfulness"] == pytest.approx(0.75)
+        assert data["answer_relevancy"] == pytest.approx(0.5)
+        assert data["context_precision"] == pytest.approx(1.0)
+
+    def test_metrics_reparsed_when_report_changes(self, test_client, tmp_path, monkeypatch):
+        """Test GET /metrics serves cached scores until the report is rewritten"""
+        import os
+
+        report = tmp_path / "ragas_report.csv"
+        report.write_text("faithfulness,answer_relevancy,context_precision\n0.2,0.2,0.2\n")
+        monkeypatch.chdir(tmp_path)
+
+        assert test_client.get("/metrics").json()["faithfulness"] == pytest.approx(0.2)
+
+        report.write_text("faithfulness,answer_relevancy,context_precision\n0.9,0.9,0.9\n")
+        stat = report.stat()
+        os.utime(report, (stat.st_atime, stat.st_mtime + 10))
+
+        assert test_client.get("/metrics").json()["faithfulness"] == pytest.approx(0.9)
+
+    def test_metrics_without_report(self, test_client, tmp_path, monkeypatch):
+        """Test GET /metrics returns zeros when no report exists"""
+        monkeypatch.chdir(tmp_path)
+
+        response = test_client.get("/metrics")
+
+        assert response.status_code == 200
+        assert response.json()["faithfulness"] == 0.0
@@ -3,41 +3,33 @@ Tests for MCP tool wrappers
 Tests tool integration with backend API
 """
 import pytest
-from unittest.mock import patch, MagicMock
 import httpx
+import orjson
 
 
 @pytest.mark.asyncio
 class TestGetRoadmap:
     """Test get_roadmap MCP tool"""
 
-    @patch('httpx.get')
-    async def test_get_roadmap_success(self, mock_get, sample_roadmap_data):
+    async def test_get_roadmap_success(self, mcp_executor, mock_backend, sample_roadmap_data):
         """Test successful roadmap retrieval"""
-        from mcp_tools import get_roadmap
-
-        # Mock HTTP response
-        mock_response = MagicMock()
-        mock_response.status_code = 200
-        mock_response.json.return_value = sample_roadmap_data
-        mock_get.return_value = mock_response
+        mock_backend.set(
+            "GET", "/api/roadmap/sections/", 200, {"success": True, "roadmap": sample_roadmap_data}
+        )
 
-        result = await get_roadmap()
+        result = orjson.loads(await mcp_executor.get_roadmap())
 
         assert result["success"] is True
         assert "roadmap" in result
         assert len(result["roadmap"]) == 1
         assert result["roadmap"][0]["title"] == "Machine Learning Fundamentals"
 
-    @patch('httpx.get')
-    async def test_get_roadmap_api_error(self, mock_get):
+    async def test_get_roadmap_api_error(self, mcp_executor, mock_backend):
         """Test roadmap retrieval with API error"""
-        from mcp_tools import get_roadmap
-
         # Mock HTTP error
-        mock_get.side_effect = httpx.RequestError("Connection failed")
+        mock_backend.fail("GET", "/api/roadmap/sections/", httpx.RequestError("Connection failed"))
 
-        result = await get_roadmap()
+        result = orjson.loads(await mcp_executor.get_roadmap())
 
         assert result["success"] is False
         assert "error" in result
@@ -47,67 +39,51 @@ class TestGetRoadmap:
 class TestGetLearningEntries:
     """Test get_learning_entries MCP tool"""
 
-    @patch('httpx.get')
-    async def test_get_learning_entries_success(self, mock_get, sample_learning_entries):
+    async def test_get_learning_entries_success(self, mcp_executor, mock_backend, sample_learning_entries):
         """Test successful learning entries retrieval"""
-        from mcp_tools import get_learning_entries
-
-        mock_response = MagicMock()
-        mock_response.status_code = 200
-        mock_response.json.return_value = sample_learning_entries
-        mock_get.return_value = mock_response
+        mock_backend.set(
+            "GET", "/api/roadmap/learning-entries/", 200,
+            {"success": True, "entries": sample_learning_entries}
+        )
 
-        result = await get_learning_entries(limit=10)
+        result = orjson.loads(await mcp_executor.get_learning_entries(limit=10))
 
         assert result["success"] is True
         assert "entries" in result
         assert len(result["entries"]) == 1
 
-    @patch('httpx.get')
-    async def test_get_learning_entries_with_roadmap_item_filter(self, mock_get):
+    async def test_get_learning_entries_with_roadmap_item_filter(self, mcp_executor, mock_backend):
         """Test filtering entries by roadmap_item"""
-        from mcp_tools import get_learning_entries
-
-        mock_response = MagicMock()
-        mock_response.status_code = 200
-        mock_response.json.return_value = []
-        mock_get.return_value = mock_response
+        mock_backend.set("GET", "/api/roadmap/learning-entries/", 200, {"success": True, "entries": []})
 
-        result = await get_learning_entries(roadmap_item_id=5, limit=20)
+        await mcp_executor.get_learning_entries(roadmap_item_id=5, limit=20)
 
         # Verify URL parameters
-        call_url = str(mock_get.call_args[0][0])
-        assert "roadmap_item=5" in call_url
-        assert "limit=20" in call_url
+        params = mock_backend.requests[-1].url.params
+        assert params["roadmap_item"] == "5"
+        assert params["limit"] == "20"
 
 
 @pytest.mark.asyncio
 class TestSearchKnowledge:
     """Test search_knowledge MCP tool"""
 
-    @patch('httpx.post')
-    async def test_search_knowledge_success(self, mock_post, sample_search_results):
+    async def test_search_knowledge_success(self, mcp_executor, mock_backend, sample_search_results):
         """Test successful knowledge search"""
-        from mcp_tools import search_knowledge
+        mock_backend.set("POST", "/api/rag/search/", 200, sample_search_results)
 
-        mock_response = MagicMock()
-        mock_response.status_code = 200
-        mock_response.json.return_value = sample_search_results
-        mock_post.return_value = mock_response
-
-        result = await search_knowledge("neural networks", top_k=3)
+        result = orjson.loads(await mcp_executor.search_knowledge("neural networks", top_k=3))
 
         assert result["success"] is True
         assert "results" in result
         assert len(result["results"]) == 1
 
-    @patch('httpx.post')
-    async def test_search_knowledge_empty_query(self, mock_post):
+    async def test_search_knowledge_empty_query(self, mcp_executor, mock_backend):
         """Test search with empty query"""
-        from mcp_tools import search_knowledge
+        mock_backend.set("POST", "/api/rag/search/", 400, {"success": False, "error": "Query is required"})
 
         # Should handle empty query gracefully
-        result = await search_knowledge("", top_k=5)
+        result = orjson.loads(await mcp_executor.search_knowledge("", top_k=5))
 
         # Either returns error or passes to API
         assert "success" in result or "error" in result
@@ -117,64 +93,49 @@ class TestSearchKnowledge:
 class TestAddLearningEntry:
     """Test add_learning_entry MCP tool"""
 
-    @patch('httpx.post')
-    async def test_add_learning_entry_success(self, mock_post):
+    async def test_add_learning_entry_success(self, mcp_executor, mock_backend):
         """Test successful learning entry creation"""
-        from mcp_tools import add_learning_entry
-
-        mock_response = MagicMock()
-        mock_response.status_code = 201
-        mock_response.json.return_value = {
+        mock_backend.set("POST", "/api/roadmap/learning-entries/", 201, {
             "success": True,
             "entry": {
                 "id": 99,
                 "title": "Test Entry",
                 "content": "Test content"
             }
-        }
-        mock_post.return_value = mock_response
+        })
 
-        result = await add_learning_entry(
+        result = orjson.loads(await mcp_executor.add_learning_entry(
             title="Test Entry",
             content="Test content",
             roadmap_item_id=1,
             is_public=True
-        )
+        ))
 
         assert result["success"] is True
         assert "entry" in result
         assert result["entry"]["id"] == 99
+        assert orjson.loads(mock_backend.requests[-1].content)["roadmap_item"] == 1
 
-    @patch('httpx.post')
-    async def test_add_learning_entry_missing_required_fields(self, mock_post):
+    async def test_add_learning_entry_missing_required_fields(self, mcp_executor, mock_backend):
         """Test entry creation with missing fields"""
-        from mcp_tools import add_learning_entry
+        mock_backend.set(
+            "POST", "/api/roadmap/learning-entries/", 400, {"title": ["This field may not be blank."]}
+        )
 
-        # Should handle missing fields gracefully or raise validation error
-        try:
-            result = await add_learning_entry(title="", content="")
-            # If it doesn't raise, check for error response
-            assert "error" in result or result["success"] is False
-        except Exception:
-            # Validation error is acceptable
-            pass
+        result = orjson.loads(await mcp_executor.add_learning_entry(title="", content=""))
+
+        assert "error" in result or result["success"] is False
 
 
 @pytest.mark.asyncio
 class TestGetProgressStats:
     """Test get_progress_stats MCP tool"""
 
-    @patch('httpx.get')
-    async def test_get_progress_stats_success(self, mock_get, sample_progress_stats):
+    async def test_get_progress_stats_success(self, mcp_executor, mock_backend, sample_progress_stats):
         """Test successful progress stats retrieval"""
-        from mcp_tools import get_progress_stats
-
-        mock_response = MagicMock()
-        mock_response.status_code = 200
-        mock_response.json.return_value = sample_progress_stats
-        mock_get.return_value = mock_response
+        mock_backend.set("GET", "/api/roadmap/progress/", 200, sample_progress_stats)
 
-        result = await get_progress_stats()
+        result = orjson.loads(await mcp_executor.get_progress_stats())
 
         assert result["success"] is True
         assert "stats" in result
@@ -182,19 +143,13 @@ class TestGetProgressStats:
         assert "learning" in result["stats"]
         assert "knowledge_base" in result["stats"]
 
-    @patch('httpx.get')
     async def test_get_progress_stats_includes_completion_percentage(
-        self, mock_get, sample_progress_stats
+        self, mcp_executor, mock_backend, sample_progress_stats
     ):
         """Test progress stats includes completion percentage"""
-        from mcp_tools import get_progress_stats
+        mock_backend.set("GET", "/api/roadmap/progress/", 200, sample_progress_stats)
 
-        mock_response = MagicMock()
-        mock_response.status_code = 200
-        mock_response.json.return_value = sample_progress_stats
-        mock_get.return_value = mock_response
-
-        result = await get_progress_stats()
+        result = orjson.loads(await mcp_executor.get_progress_stats())
 
         assert "completion_percentage" in result["stats"]["roadmap"]
         assert result["stats"]["roadmap"]["completion_percentage"] == 50.0
@@ -204,30 +159,73 @@ class TestGetProgressStats:
 class TestToolErrorHandling:
     """Test error handling across all tools"""
 
-    @patch('httpx.get')
-    async def test_tool_handles_timeout(self, mock_get):
+    async def test_tool_handles_timeout(self, mcp_executor, mock_backend):
         """Test tools handle timeout errors"""
-        from mcp_tools import get_roadmap
-
-        mock_get.side_effect = httpx.TimeoutException("Request timeout")
+        mock_backend.fail("GET", "/api/roadmap/sections/", httpx.TimeoutException("Request timeout"))
 
-        result = await get_roadmap()
+        result = orjson.loads(await mcp_executor.get_roadmap())
 
         assert result["success"] is False
         assert "error" in result
         assert "timeout" in result["error"].lower()
 
-    @patch('httpx.post')
-    async def test_tool_handles_server_error(self, mock_post):
+    async def test_tool_handles_server_error(self, mcp_executor, mock_backend):
         """Test tools handle 500 errors"""
-        from mcp_tools import search_knowledge
+        mock_backend.set("POST", "/api/rag/search/", 500, text="Internal Server Error")
 
-        mock_response = MagicMock()
-        mock_response.status_code = 500
-        mock_response.text = "Internal Server Error"
-        mock_post.return_value = mock_response
-
-        result = await search_knowledge("test query")
+        result = orjson.loads(await mcp_executor.search_knowledge("test query"))
 
         assert result["success"] is False
         assert "error" in result
+
+
+@pytest.mark.asyncio
+class TestConnectionReuse:
+    """Test tool calls share the executor's pooled client"""
+
+    async def test_calls_reuse_one_client(self, mcp_executor, mock_backend, sample_progress_stats):
+        """Test consecutive tool calls go through the same AsyncClient"""
+        mock_backend.set("GET", "/api/roadmap/progress/", 200, sample_progress_stats)
+        client = mcp_executor.client
+
+        await mcp_executor.get_progress_stats()
+        await mcp_executor.get_progress_stats()
+
+        assert mcp_executor.client is client
+        assert len(mock_backend.requests) == 2
+
+
+class TestToolManifest:
+    """Test the compact tool manifest rendered into the ReAct prompt"""
+
+    def test_manifest_names_arguments_for_sync_and_async_tools(self):
+        """Test argument names come from the declared schema, not the implementation"""
+        from langchain.tools import StructuredTool
+        from agent import render_tool_summaries
+
+        def lookup(query: str, top_k: int = 5) -> str:
+            """Look up a query. Extra detail."""
+            return query
+
+        async def alookup(query: str, top_k: int = 5) -> str:
+            """Look up a query. Extra detail."""
+            return query
+
+        manifest = render_tool_summaries([
+            StructuredTool.from_function(func=lookup, name="sync_lookup"),
+            StructuredTool.from_function(coroutine=alookup, name="async_lookup")
+        ])
+
+        assert "- sync_lookup(query: str, top_k: int = 5): Look up a query" in manifest
+        assert "- async_lookup(query: str, top_k: int = 5): Look up a query" in manifest
+
+    def test_manifest_names_arguments_for_mcp_tools(self, mcp_executor):
+        """Test the coroutine-backed MCP tools keep their argument names in the manifest"""
+        from mcp_tools import _build_tools
+        from agent import render_tool_summaries
+
+        manifest = render_tool_summaries(_build_tools(mcp_executor))
+
+        assert "- search_knowledge(query: str, top_k: int = 5):" in manifest
+        assert "- get_learning_entries(roadmap_item_id" in manifest
+        assert "- add_learning_entry(title: str, content: str," in manifest
@@ -0,0 +1,20 @@
+"""
+Timestamp helpers shared by the API and conversation memory
+"""
+import time
+from typing import Tuple
+
+# (epoch second, "YYYY-MM-DDTHH:MM:SS") so only the microseconds are formatted per call
+_iso_second_cache: Tuple[int, str] = (-1, "")
+
+
+def utcnow_iso() -> str:
+    """Current UTC time in datetime.isoformat() form, reusing the per-second prefix"""
+    global _iso_second_cache
+    seconds, nanos = divmod(time.time_ns(), 1_000_000_000)
+    # Read the cache once; the tuple is swapped atomically, so threads never see a torn pair
+    cached_seconds, prefix = _iso_second_cache
+    if cached_seconds != seconds:
+        prefix = time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(seconds))
+        _iso_second_cache = (seconds, prefix)
+    return f"{prefix}.{nanos // 1000:06d}"
@@ -1,13 +1,14 @@
 """
 GitHub webhook endpoint for automatic learning log generation.
 """
+import functools
 import hmac
-import hashlib
-import json
 import logging
 import os
-from typing import Any, Dict
+import re
+from typing import Any, Dict, Optional, Tuple
 
+import orjson
 from django.http import JsonResponse
 from django.conf import settings
 from django.views.decorators.csrf import csrf_exempt
@@ -16,24 +17,78 @@ from rest_framework import status
 from rest_framework.permissions import AllowAny
 from rest_framework.views import APIView
 
-from .parsers import parse_push_event, parse_pull_request_event
-from .tasks import create_learning_entries_from_events
+from .parsers import SUPPORTED_PR_ACTIONS, parse_push_event, parse_pull_request_event
+from .tasks import enqueue_learning_entries
 
 logger = logging.getLogger(__name__)
 
+# GitHub sends "action" as the first key of pull_request payloads
+_ACTION_RE = re.compile(rb'"action"\s*:\s*"([^"]+)"')
+_ACTION_SCAN_BYTES = 4096
 
-def _verify_signature(secret: str, payload: bytes, signature_header: str) -> bool:
+_SIGNATURE_PREFIX = "sha256="
+# Environment fallback when settings.GITHUB_WEBHOOK_SECRET is absent, read once at import
+_ENV_WEBHOOK_SECRET = os.getenv("GITHUB_WEBHOOK_SECRET", "")
+
+# Bodies above the threshold are hashed while being read instead of after buffering
+_STREAM_THRESHOLD_BYTES = 1024 * 1024
+_STREAM_CHUNK_BYTES = 64 * 1024
+
+
+@functools.lru_cache(maxsize=8)
+def _encode_secret(secret: str) -> bytes:
     """
-    Validate the GitHub webhook signature.
+    Encode the webhook secret once per distinct value.
     """
-    if not signature_header or not signature_header.startswith("sha256="):
+    return secret.encode("utf-8")
+
+
+def _parse_signature(signature_header: str) -> Optional[bytes]:
+    """
+    Decode the hex digest from an X-Hub-Signature-256 header, or None if malformed.
+    """
+    if not signature_header or not signature_header.startswith(_SIGNATURE_PREFIX):
+        return None
+
+    try:
+        return bytes.fromhex(signature_header[len(_SIGNATURE_PREFIX):])
+    except ValueError:
+        return None
+
+
+def _compute_signature_match(secret: str, payload: bytes, signature_header: str) -> bool:
+    """
+    Compute the HMAC digest and compare it with the signature header.
+    """
+    received_sig = _parse_signature(signature_header)
+    if not secret or received_sig is None:
         return False
 
-    received_sig = signature_header.split("sha256=")[-1]
-    digest = hmac.new(secret.encode("utf-8"), payload, hashlib.sha256).hexdigest()
+    digest = hmac.digest(_encode_secret(secret), payload, "sha256")
     return hmac.compare_digest(digest, received_sig)
 
 
+def _read_and_verify_stream(stream, secret: str, signature_header: str) -> Tuple[bytearray, bool]:
+    """
+    Read a large request body in chunks, feeding each chunk to the HMAC as it arrives.
+
+    The buffer is returned as-is (orjson and the action regex accept bytearray),
+    so the body is held in memory once, as with request.body.
+
+    Returns:
+        (body buffer, whether the signature matched)
+    """
+    mac = hmac.new(_encode_secret(secret), digestmod="sha256")
+    buffer = bytearray()
+    for chunk in iter(functools.partial(stream.read, _STREAM_CHUNK_BYTES), b""):
+        mac.update(chunk)
+        buffer += chunk
+
+    received_sig = _parse_signature(signature_header)
+    valid = bool(secret) and received_sig is not None and hmac.compare_digest(mac.digest(), received_sig)
+    return buffer, valid
+
+
 @method_decorator(csrf_exempt, name="dispatch")
 class GitHubWebhookView(APIView):
     """
@@ -43,7 +98,7 @@ class GitHubWebhookView(APIView):
     permission_classes = [AllowAny]
 
     def post(self, request, *args, **kwargs):
-        secret = getattr(settings, "GITHUB_WEBHOOK_SECRET", os.getenv("GITHUB_WEBHOOK_SECRET", ""))
+        secret = getattr(settings, "GITHUB_WEBHOOK_SECRET", _ENV_WEBHOOK_SECRET)
         if not secret:
             return JsonResponse(
                 {"success": False, "error": "GITHUB_WEBHOOK_SECRET not configured"},
@@ -54,16 +109,37 @@ class GitHubWebhookView(APIView):
         event_type = request.headers.get("X-GitHub-Event", "")
         delivery_id = request.headers.get("X-GitHub-Delivery", "")
 
-        if not _verify_signature(secret, request.body, signature):
+        content_length = int(request.META.get("CONTENT_LENGTH") or 0)
+        if content_length > _STREAM_THRESHOLD_BYTES and request.stream is not None:
+            max_size = settings.DATA_UPLOAD_MAX_MEMORY_SIZE
+            if max_size is not None and content_length > max_size:
+                return JsonResponse(
+                    {"success": False, "error": "Payload too large"},
+                    status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                )
+            body, valid = _read_and_verify_stream(request.stream, secret, signature)
+        else:
+            body = request.body
+            valid = _compute_signature_match(secret, body, signature)
+
+        if not valid:
             logger.warning("Invalid GitHub webhook signature (delivery %s)", delivery_id)
             return JsonResponse(
                 {"success": False, "error": "Invalid signature"},
                 status=status.HTTP_401_UNAUTHORIZED,
             )
 
+        if event_type == "pull_request":
+            action_match = _ACTION_RE.search(body, 0, _ACTION_SCAN_BYTES)
+            if action_match and action_match.group(1).decode("utf-8", "replace") not in SUPPORTED_PR_ACTIONS:
+                return JsonResponse(
+                    {"success": True, "message": "Ignored pull_request action"},
+                    status=status.HTTP_200_OK,
+                )
+
         try:
-            payload: Dict[str, Any] = json.loads(request.body.decode("utf-8"))
-        except json.JSONDecodeError:
+            payload: Dict[str, Any] = orjson.loads(body)
+        except orjson.JSONDecodeError:
             return JsonResponse(
                 {"success": False, "error": "Invalid JSON payload"},
                 status=status.HTTP_400_BAD_REQUEST,
@@ -74,16 +150,14 @@ class GitHubWebhookView(APIView):
 
         if event_type == "push":
             parsed_entries = parse_push_event(payload, delivery_id=delivery_id)
-            result = create_learning_entries_from_events(parsed_entries, delivery_id=delivery_id)
+            if not enqueue_learning_entries(parsed_entries, delivery_id=delivery_id):
+                return JsonResponse(
+                    {"success": True, "message": "Duplicate delivery ignored"},
+                    status=status.HTTP_200_OK,
+                )
             return JsonResponse(
-                {
-                    "success": True,
-                    "message": "Processed push event",
-                    "created": result.get("created", 0),
-                    "skipped": result.get("skipped", 0),
-                    "roadmap_item_id": result.get("roadmap_item_id"),
-                },
-                status=status.HTTP_201_CREATED if result.get("created") else status.HTTP_200_OK,
+                {"success": True, "accepted": True, "message": "Queued push event"},
+                status=status.HTTP_202_ACCEPTED,
             )
 
         if event_type == "pull_request":
@@ -93,16 +167,14 @@ class GitHubWebhookView(APIView):
                     {"success": True, "message": "Ignored pull_request action"},
                     status=status.HTTP_200_OK,
                 )
-            result = create_learning_entries_from_events(parsed_entries, delivery_id=delivery_id)
+            if not enqueue_learning_entries(parsed_entries, delivery_id=delivery_id):
+                return JsonResponse(
+                    {"success": True, "message": "Duplicate delivery ignored"},
+                    status=status.HTTP_200_OK,
+                )
             return JsonResponse(
-                {
-                    "success": True,
-                    "message": "Processed pull_request event",
-                    "created": result.get("created", 0),
-                    "skipped": result.get("skipped", 0),
-                    "roadmap_item_id": result.get("roadmap_item_id"),
-                },
-                status=status.HTTP_201_CREATED if result.get("created") else status.HTTP_200_OK,
+                {"success": True, "accepted": True, "message": "Queued pull_request event"},
+                status=status.HTTP_202_ACCEPTED,
             )
 
         return JsonResponse(
@@ -1,8 +1,17 @@
 """
 Parsers for incoming automation events (e.g., GitHub webhooks).
 """
+from itertools import chain
 from typing import Dict, List, Any, Optional
 
+# pull_request actions that represent a meaningful state change
+SUPPORTED_PR_ACTIONS = frozenset({"opened", "closed", "reopened", "ready_for_review"})
+
+_CHANGE_KEYS = ("added", "modified", "removed")
+_COMMITS_HEADER = ("", "Commits:")
+_PLURAL = ("commit", "commits")
+_EMPTY: Dict[str, Any] = {}
+
 
 def parse_push_event(payload: Dict[str, Any], delivery_id: Optional[str] = None) -> List[Dict[str, Any]]:
     """
@@ -19,56 +28,48 @@ def parse_push_event(payload: Dict[str, Any], delivery_id: Optional[str] = None)
     if not commits:
         return []
 
-    commit_lines: List[str] = []
+    # Single pass into parallel field arrays, then one comprehension for the lines
     commit_messages: List[str] = []
-    changed_files: List[str] = []
+    authors: List[str] = []
+    shas: List[str] = []
+    urls: List[str] = []
+    changed_files = set()
 
     for commit in commits:
-        message = (commit.get("message") or "").strip()
-        commit_messages.append(message)
-        author = (commit.get("author") or {}).get("name") or "unknown author"
-        sha_short = (commit.get("id") or commit.get("sha") or "")[:7]
-        url = commit.get("url")
-        for key in ["added", "modified", "removed"]:
-            for path in commit.get(key) or []:
-                changed_files.append(path)
-
-        line = f"- {message} (by {author}"
-        if sha_short:
-            line += f", {sha_short}"
-        line += ")"
-        if url:
-            line += f" {url}"
-
-        commit_lines.append(line)
+        get = commit.get
+        commit_messages.append((get("message") or "").strip())
+        authors.append((get("author") or _EMPTY).get("name") or "unknown author")
+        shas.append((get("id") or get("sha") or "")[:7])
+        urls.append(get("url"))
+        for key in _CHANGE_KEYS:
+            changed_files.update(get(key) or ())
+
+    commit_lines = [
+        f"- {message} (by {author}{f', {sha}' if sha else ''}){f' {url}' if url else ''}"
+        for message, author, sha, url in zip(commit_messages, authors, shas, urls, strict=True)
+    ]
 
     compare_url = payload.get("compare")
 
-    content_lines = [
+    unique_files = sorted(changed_files)
+    header_lines = [
         f"GitHub Delivery ID: {delivery_id or 'unknown'}",
         f"Repository: {repo_name}",
         f"Branch: {branch}",
     ]
     if compare_url:
-        content_lines.append(f"Compare: {compare_url}")
+        header_lines.append(f"Compare: {compare_url}")
+    header_lines.append("")
 
-    content_lines.append("")
-    if changed_files:
-        unique_files = sorted(set(changed_files))
-        content_lines.append("")
-        content_lines.append("Files changed:")
-        content_lines.extend(f"- {fp}" for fp in unique_files)
-
-    content_lines.append("")
-    content_lines.append("Commits:")
-    content_lines.extend(commit_lines)
+    files_lines = ("", "Files changed:", *(f"- {fp}" for fp in unique_files)) if unique_files else ()
+    content = "\n".join(chain(header_lines, files_lines, _COMMITS_HEADER, commit_lines))
 
     entry = {
-        "title": f"GitHub push • {repo_name} • {branch} ({len(commits)} commit{'s' if len(commits) != 1 else ''})",
-        "content": "\n".join(content_lines),
+        "title": f"GitHub push • {repo_name} • {branch} ({len(commits)} {_PLURAL[len(commits) != 1]})",
+        "content": content,
         "is_public": True,
         "messages": commit_messages,
-        "files": sorted(set(changed_files)),
+        "files": unique_files,
         # Extra context for downstream LLM summarization
         "summary_payload": {
             "event_type": "push",
@@ -76,9 +77,10 @@ def parse_push_event(payload: Dict[str, Any], delivery_id: Optional[str] = None)
             "repository": repo_name,
             "branch": branch,
             "compare_url": compare_url,
-            "commit_messages": commit_messages,
+            # Frozen copy so mutating entry["messages"] cannot leak into the summary
+            "commit_messages": tuple(commit_messages),
             "commit_lines": commit_lines,
-            "files": sorted(set(changed_files)),
+            "files": list(unique_files),
         },
     }
 
@@ -93,8 +95,7 @@ def parse_pull_request_event(payload: Dict[str, Any], delivery_id: Optional[str]
     action = payload.get("action") or "unknown"
 
     # Only process meaningful state changes
-    supported_actions = {"opened", "closed", "reopened", "ready_for_review"}
-    if action not in supported_actions:
+    if action not in SUPPORTED_PR_ACTIONS:
         return []
 
     repository = payload.get("repository", {}) or {}
@@ -1,183 +1,490 @@
 """
 Task helpers for automation workflows (e.g., creating learning entries).
 """
-import json
+import functools
+import hashlib
 import logging
 import os
-from typing import Dict, List, Any, Optional, Tuple
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from itertools import chain
+from typing import Dict, Iterable, List, Any, Optional, Tuple
+
+import ahocorasick
+import httpx
+import orjson
+from django.conf import settings
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+from django.core.cache import cache
+from django.db import IntegrityError, close_old_connections, connection, transaction
+from django.db.models.signals import post_delete, post_save
+from groq import DefaultHttpxClient, Groq
+
+from portfolio.models import LearningEntry, RoadmapItem, RoadmapSection
 
-from django.db import transaction
-from groq import Groq
+logger = logging.getLogger(__name__)
 
-from portfolio.models import LearningEntry, RoadmapItem
+# Webhook processing runs off the request thread; DB writes and Groq calls dominate
+_TASK_EXECUTOR = ThreadPoolExecutor(
+    max_workers=int(os.getenv("AUTOMATION_TASK_WORKERS", "2")),
+    thread_name_prefix="automation-task",
+)
+TASK_MAX_ATTEMPTS = 3
+TASK_RETRY_BACKOFF_SECONDS = 2.0
 
-logger = logging.getLogger(__name__)
+# Deliveries are claimed in the cache before enqueueing, so redeliveries are dropped up front.
+# The claim only covers the in-flight window: if the worker dies it lapses and a redelivery is
+# processed; completed deliveries are deduplicated by LearningEntry.delivery_id instead.
+DELIVERY_CLAIM_PREFIX = "github_delivery:"
+DELIVERY_CLAIM_TTL_SECONDS = 5 * 60
+
+# Deliveries this process already stored; retries on the same worker skip the DB check
+RECENT_DELIVERIES_MAX = 1024
+_recent_deliveries: "OrderedDict[str, None]" = OrderedDict()
+_recent_deliveries_lock = threading.Lock()
+
+# Roadmap outline for LLM prompts; invalidated by roadmap signals, TTL covers other processes
+ROADMAP_HINT_TTL_SECONDS = 300
+_roadmap_hint_cache: Dict[str, Any] = {"value": None, "ts": 0.0}
+# Matching snapshot shared across deliveries (same TTL/invalidation); one (snapshot, ts) tuple
+_roadmap_snapshot_cache: Dict[str, Any] = {"entry": (None, 0.0)}
 
+# Optional PostgreSQL full-text prefilter for large roadmaps (AUTOMATION_FTS_MATCHING)
+FTS_CANDIDATE_LIMIT = 20
 
-def _roadmap_hint() -> str:
+# Webhook summaries arrive minutes apart; the SDK's 5s keep-alive would redo TLS on almost every call
+GROQ_KEEPALIVE_SECONDS = 120.0
+
+
+@functools.lru_cache(maxsize=4)
+def _get_groq_client(api_key: str) -> Groq:
     """
-    Build a compact, human-readable roadmap outline for the LLM to reference.
+    Return a shared Groq client per API key (reuses its HTTP connection pool).
     """
-    sections: Dict[str, List[str]] = {}
-    for item in RoadmapItem.objects.select_related("section").all():
-        section_title = item.section.title if item.section else "Unsectioned"
-        sections.setdefault(section_title, []).append(item.title or "")
+    http_client = DefaultHttpxClient(
+        limits=httpx.Limits(
+            max_connections=20,
+            max_keepalive_connections=10,
+            keepalive_expiry=GROQ_KEEPALIVE_SECONDS,
+        )
+    )
+    return Groq(api_key=api_key, http_client=http_client)
 
-    if not sections:
-        return ""
 
-    lines: List[str] = []
-    for section, titles in sections.items():
-        deduped = [t for t in dict.fromkeys([t for t in titles if t]).keys()]
-        if deduped:
-            lines.append(f"- {section}: {', '.join(deduped)}")
-        else:
-            lines.append(f"- {section}: (no items)")
-    return "\n".join(lines)
+def _invalidate_roadmap_hint(**kwargs) -> None:
+    """
+    Signal receiver: drop the cached roadmap outline and snapshot after roadmap edits.
+    """
+    _roadmap_hint_cache["value"] = None
+    _roadmap_snapshot_cache["entry"] = (None, 0.0)
+
 
+for _sender in (RoadmapItem, RoadmapSection):
+    for _signal, _name in ((post_save, "save"), (post_delete, "delete")):
+        _signal.connect(_invalidate_roadmap_hint, sender=_sender, dispatch_uid=f"roadmap_hint_{_name}_{_sender.__name__}")
 
-def _section_bias_tokens() -> Dict[str, List[str]]:
+
+_TOKEN_PUNCTUATION = ".,;:!?()[]{}\"'`"
+
+
+# Heuristic tokens that strongly bias matching toward specific sections; extend as sections are added
+_SECTION_BIAS_TOKENS: Dict[str, Dict[str, Tuple[str, ...]]] = {
+    "agents": {
+        "section_keywords": ("agent", "mcp", "automation", "tool"),
+        "tokens": ("mcp", "agent", "agents", "tool", "tools", "automation", "webhook", "orchestration"),
+        "paths": ("automation/", "mcp_server/", "agent_service/", "scripts/agents"),
+    },
+    "rag": {
+        "section_keywords": ("rag", "vector", "embedding", "search"),
+        "tokens": ("rag", "retrieval", "embedding", "embeddings", "vector", "chunk", "chunks", "chunking", "pgvector", "similarity", "index"),
+        "paths": ("vector", "embedding", "rag", "search", "knowledge"),
+    },
+    "safety": {
+        "section_keywords": ("safety", "security", "guardrail", "audit", "evaluation", "bias"),
+        "tokens": ("security", "guardrail", "guardrails", "audit", "safety", "jailbreak", "attack", "defense", "bias", "eval", "evaluation"),
+        "paths": ("security", "audit", "guardrail", "safety", "tests/security"),
+    },
+}
+
+
+def _tokenize(text: str) -> List[str]:
     """
-    Heuristic tokens that should strongly bias matching toward specific sections.
-    Extendable if new sections are added later.
+    Split lowercased text into words, treating "/" as a separator and trimming punctuation.
     """
-    return {
-        "agents": {
-            "section_keywords": ["agent", "mcp", "automation", "tool"],
-            "tokens": ["mcp", "agent", "agents", "tool", "tools", "automation", "webhook", "orchestration"],
-            "paths": ["automation/", "mcp_server/", "agent_service/", "scripts/agents"],
-        },
-        "rag": {
-            "section_keywords": ["rag", "vector", "embedding", "search"],
-            "tokens": ["rag", "retrieval", "embedding", "embeddings", "vector", "chunk", "chunks", "chunking", "pgvector", "similarity", "index"],
-            "paths": ["vector", "embedding", "rag", "search", "knowledge"],
-        },
-        "safety": {
-            "section_keywords": ["safety", "security", "guardrail", "audit", "evaluation", "bias"],
-            "tokens": ["security", "guardrail", "guardrails", "audit", "safety", "jailbreak", "attack", "defense", "bias", "eval", "evaluation"],
-            "paths": ["security", "audit", "guardrail", "safety", "tests/security"],
-        },
-    }
+    return [tok.strip(_TOKEN_PUNCTUATION) for tok in text.replace("/", " ").split()]
 
 
-def _guess_roadmap_item_id(messages: List[str]) -> Optional[int]:
+def _fts_candidate_ids(entry_tokens: Iterable[str]) -> Optional[List[int]]:
     """
-    Naive roadmap item matching based on commit messages.
+    Rank roadmap items against the entry words with PostgreSQL full-text search.
+
+    Uses the GIN expression index from migration 0011. Returns None when the feature flag
+    is off or the database is not PostgreSQL, so callers keep the in-memory scorer.
     """
-    if not messages:
+    if not getattr(settings, "AUTOMATION_FTS_MATCHING", False) or connection.vendor != "postgresql":
         return None
+    # Raw tsquery syntax: only plain words, OR-ed so any overlap ranks
+    terms = sorted(tok for tok in set(entry_tokens) if tok.isalnum())
+    if not terms:
+        return []
+    vector = SearchVector("title", "description", config="english")
+    query = SearchQuery(" | ".join(terms), search_type="raw", config="english")
+    ranked = (
+        RoadmapItem.objects.annotate(search=vector, rank=SearchRank(vector, query))
+        .filter(search=query)
+        .order_by("-rank")
+        .values_list("id", flat=True)
+    )
+    return list(ranked[:FTS_CANDIDATE_LIMIT])
 
-    message_blob = " ".join(messages).lower()
-    for item in RoadmapItem.objects.all():
-        title_lower = (item.title or "").lower()
-        if title_lower and title_lower in message_blob:
-            return item.id
 
+def _load_roadmap_snapshot() -> List[Dict[str, Any]]:
+    """
+    Fetch every roadmap item once, with lowercased fields precomputed for matching.
+    """
+    snapshot: List[Dict[str, Any]] = []
+    # Plain tuples of just the five needed columns: no model instances, no per-row dicts
+    rows = RoadmapItem.objects.values_list("id", "title", "description", "section__title", "section__order")
+    for item_id, title, description, section_title, section_order in rows:
+        title = title or ""
+        description = description or ""
+        section_title = section_title or ""
+        title_lower = title.lower()
+        desc_lower = description.lower()
+        section_title_lower = section_title.lower()
+        # (token, weight) per occurrence; matching is a set lookup against the entry tokens
+        weighted_tokens = tuple(
+            (tok, weight)
+            for chunk, weight in ((title_lower, 2), (desc_lower, 1), (section_title_lower, 3))
+            for tok in _tokenize(chunk)
+            if len(tok) >= 3
+        )
+        snapshot.append({
+            "id": item_id,
+            "title": title,
+            "description": description,
+            "section_title": section_title,
+            "section_order": section_order,
+            "title_lower": title_lower,
+            "desc_lower": desc_lower,
+            "section_title_lower": section_title_lower,
+            "weighted_tokens": weighted_tokens,
+            # Most the token-overlap step can add; feeds the matcher's upper bound
+            "token_score_cap": sum(len(tok) * weight for tok, weight in weighted_tokens),
+            "section_key": _section_key(section_title_lower),
+        })
+    return snapshot
+
+
+def _cached_roadmap_snapshot() -> List[Dict[str, Any]]:
+    """
+    Return the roadmap snapshot, reloading it after roadmap edits or ROADMAP_HINT_TTL_SECONDS.
+
+    Reusing the same list across deliveries also keeps the identity-keyed phrase automaton warm.
+    Callers must treat the snapshot as read-only.
+    """
+    snapshot, loaded_at = _roadmap_snapshot_cache["entry"]
+    if snapshot is not None and time.monotonic() - loaded_at < ROADMAP_HINT_TTL_SECONDS:
+        return snapshot
+    snapshot = _load_roadmap_snapshot()
+    _roadmap_snapshot_cache["entry"] = (snapshot, time.monotonic())
+    return snapshot
+
+
+def _section_key(section_title_lower: str) -> Optional[str]:
+    """
+    Map a section title to its bias taxonomy key (first keyword hit wins).
+    """
+    for key, cfg in _SECTION_BIAS_TOKENS.items():
+        for kw in cfg["section_keywords"]:
+            if kw in section_title_lower:
+                return key
     return None
 
 
+# Phrase automaton for the most recent snapshot (rebuilt when a new snapshot is passed in)
+# Stored as one (snapshot, automaton) tuple so worker threads never see a mismatched pair
+_phrase_automaton_cache: Dict[str, Any] = {"entry": (None, None)}
+
+
+# Snapshot indexes grouped by bias taxonomy key, cached like the phrase automaton
+_section_indexes_cache: Dict[str, Any] = {"entry": (None, None)}
+
+
+def _section_indexes(roadmap_snapshot: List[Dict[str, Any]]) -> Dict[Optional[str], Tuple[int, ...]]:
+    """
+    Group snapshot indexes by each item's section taxonomy key, in snapshot order.
+    """
+    cached_snapshot, cached_indexes = _section_indexes_cache["entry"]
+    if cached_snapshot is roadmap_snapshot:
+        return cached_indexes
+
+    grouped: Dict[Optional[str], List[int]] = {}
+    for idx, item in enumerate(roadmap_snapshot):
+        grouped.setdefault(item["section_key"], []).append(idx)
+    indexes = {key: tuple(idxs) for key, idxs in grouped.items()}
+
+    _section_indexes_cache["entry"] = (roadmap_snapshot, indexes)
+    return indexes
+
+
+# First item id per (title, section) lookup key, cached like the phrase automaton
+_title_lookup_cache: Dict[str, Any] = {"entry": (None, None)}
+
+
+def _title_lookup(roadmap_snapshot: List[Dict[str, Any]]) -> Dict[Tuple[Optional[str], Optional[str]], int]:
+    """
+    Map (title_lower, section_title_lower) to the first matching item id, in snapshot order.
+
+    Either part may be None to mean "any", so LLM candidates naming only an item or only a
+    section resolve with one dict lookup.
+    """
+    cached_snapshot, cached_lookup = _title_lookup_cache["entry"]
+    if cached_snapshot is roadmap_snapshot:
+        return cached_lookup
+
+    lookup: Dict[Tuple[Optional[str], Optional[str]], int] = {}
+    for item in roadmap_snapshot:
+        title, section = item["title_lower"], item["section_title_lower"]
+        for key in ((title, section), (title, None), (None, section), (None, None)):
+            lookup.setdefault(key, item["id"])
+
+    _title_lookup_cache["entry"] = (roadmap_snapshot, lookup)
+    return lookup
+
+
+def _phrase_automaton(roadmap_snapshot: List[Dict[str, Any]]) -> Optional[ahocorasick.Automaton]:
+    """
+    Compile every item's title/description/section phrase into one Aho-Corasick automaton.
+
+    Each pattern maps to (phrase, (snapshot index, weight) pairs that use it, index of the
+    first item whose title is the phrase or None).
+    """
+    cached_snapshot, cached_automaton = _phrase_automaton_cache["entry"]
+    if cached_snapshot is roadmap_snapshot:
+        return cached_automaton
+
+    owners: Dict[str, List[Tuple[int, int]]] = {}
+    title_owner: Dict[str, int] = {}
+    for idx, item in enumerate(roadmap_snapshot):
+        if item["title_lower"]:
+            title_owner.setdefault(item["title_lower"], idx)
+        for phrase, weight in (
+            (item["title_lower"], 3),
+            (item["desc_lower"], 2),
+            (item["section_title_lower"], 4),
+        ):
+            if phrase:
+                owners.setdefault(phrase, []).append((idx, weight))
+
+    automaton = None
+    if owners:
+        automaton = ahocorasick.Automaton()
+        for phrase, pairs in owners.items():
+            automaton.add_word(phrase, (phrase, tuple(pairs), title_owner.get(phrase)))
+        automaton.make_automaton()
+
+    _phrase_automaton_cache["entry"] = (roadmap_snapshot, automaton)
+    return automaton
+
+
+def _roadmap_hint(roadmap_snapshot: Optional[List[Dict[str, Any]]] = None) -> str:
+    """
+    Build a compact, human-readable roadmap outline for the LLM to reference.
+
+    The outline is cached for ROADMAP_HINT_TTL_SECONDS and cleared on roadmap saves/deletes.
+    """
+    cached = _roadmap_hint_cache["value"]
+    if cached is not None and time.monotonic() - _roadmap_hint_cache["ts"] < ROADMAP_HINT_TTL_SECONDS:
+        return cached
+
+    if roadmap_snapshot is None:
+        roadmap_snapshot = _load_roadmap_snapshot()
+
+    # Group and dedupe in one pass; the inner dicts are insertion-ordered sets of titles
+    sections: Dict[str, Dict[str, None]] = {}
+    for item in roadmap_snapshot:
+        titles = sections.setdefault(item["section_title"] or "Unsectioned", {})
+        if item["title"]:
+            titles[item["title"]] = None
+
+    lines = [
+        f"- {section}: {', '.join(titles) if titles else '(no items)'}"
+        for section, titles in sections.items()
+    ]
+
+    hint = "\n".join(lines)
+    _roadmap_hint_cache.update(value=hint, ts=time.monotonic())
+    return hint
+
+
+def _guess_roadmap_item_id(
+    messages: Iterable[str],
+    roadmap_snapshot: Optional[List[Dict[str, Any]]] = None,
+) -> Optional[int]:
+    """
+    Naive roadmap item matching based on commit messages.
+
+    Returns the first item (in roadmap order) whose title appears in the messages,
+    found with one automaton pass over the message blob. ``messages`` is consumed once.
+    """
+    message_blob = " ".join(messages).lower()
+    if not message_blob:
+        return None
+
+    if roadmap_snapshot is None:
+        roadmap_snapshot = _load_roadmap_snapshot()
+
+    automaton = _phrase_automaton(roadmap_snapshot)
+    if automaton is None:
+        return None
+
+    title_hits = [title_idx for _, (_, _, title_idx) in automaton.iter(message_blob) if title_idx is not None]
+    return roadmap_snapshot[min(title_hits)]["id"] if title_hits else None
+
+
+@functools.lru_cache(maxsize=1)
+def _bias_token_automaton() -> ahocorasick.Automaton:
+    """
+    One automaton over every taxonomy bias token; each maps to the keys that list it.
+
+    The taxonomy is static, so this is built once per process.
+    """
+    owners: Dict[str, List[str]] = {}
+    for key, cfg in _SECTION_BIAS_TOKENS.items():
+        for tok in cfg["tokens"]:
+            owners.setdefault(tok, []).append(key)
+    automaton = ahocorasick.Automaton()
+    for tok, keys in owners.items():
+        automaton.add_word(tok, tuple(keys))
+    automaton.make_automaton()
+    return automaton
+
+
 def _match_roadmap_item_by_text(
     summary: Optional[str],
     raw: str,
     files: Optional[List[str]] = None,
     llm_candidates: Optional[List[Dict[str, Any]]] = None,
+    roadmap_snapshot: Optional[List[Dict[str, Any]]] = None,
 ) -> Optional[int]:
     """
     Try to map the entry to a roadmap item using the Groq summary (preferred) and raw text.
     Simple keyword overlap against roadmap item titles/descriptions.
     """
-    if RoadmapItem.objects.count() == 0:
+    if roadmap_snapshot is None:
+        roadmap_snapshot = _load_roadmap_snapshot()
+    if not roadmap_snapshot:
         return None
 
     text = " ".join(t for t in [summary or "", raw] if t).lower()
     if not text.strip():
         return None
+    entry_tokens = set(_tokenize(text))
 
     best_id: Optional[int] = None
+    best_idx = -1
     best_score = 0
-    taxonomy = _section_bias_tokens()
-    debug_candidates = []
-    file_paths = files or []
-
-    for item in RoadmapItem.objects.select_related("section").all():
-        title = (item.title or "").lower()
-        desc = (item.description or "").lower()
-        section_title = (item.section.title if item.section else "") or ""
-        section_title_lower = section_title.lower()
-
-        # Exact phrase matches get a heavy boost
-        score = 0
-        for phrase, weight in [
-            (title, 3),
-            (desc, 2),
-            (section_title_lower, 4),
-        ]:
-            if phrase and phrase in text:
-                score += len(phrase) * weight
-
-        # Token-level overlap with variable weights
-        tokens: List[tuple[str, int]] = []
-        for chunk, weight in [
-            (title, 2),
-            (desc, 1),
-            (section_title_lower, 3),
-        ]:
-            if not chunk:
-                continue
-            for tok in chunk.replace("/", " ").split():
-                if len(tok) >= 3:
-                    tokens.append((tok, weight))
-
-        for tok, weight in tokens:
-            if tok in text:
-                score += len(tok) * weight
-
-        # Section bias: strong bonus if text or file paths contain bias tokens that map to the section
-        section_bias_score = 0
-        section_key = None
-        for key, cfg in taxonomy.items():
-            for kw in cfg.get("section_keywords", []):
-                if kw in section_title_lower:
-                    section_key = key
-                    break
-            if section_key:
+    file_paths = [fp.lower() for fp in files or []]
+
+    # Exact phrase matches get a heavy boost; one linear pass finds every phrase present
+    phrase_scores: Dict[int, int] = {}
+    automaton = _phrase_automaton(roadmap_snapshot)
+    if automaton is not None:
+        matched = {value for _, value in automaton.iter(text)}
+        for phrase, pairs, _ in matched:
+            for idx, weight in pairs:
+                phrase_scores[idx] = phrase_scores.get(idx, 0) + len(phrase) * weight
+
+    # Section bias depends only on the taxonomy key, so score each key once per entry
+    token_hit_keys = {key for _, keys in _bias_token_automaton().iter(text) for key in keys}
+    bias_by_key: Dict[str, int] = {}
+    for key, cfg in _SECTION_BIAS_TOKENS.items():
+        bias = 0
+        if key in token_hit_keys:
+            bias += 25  # one token hit is enough
+        if any(path in fp for path in cfg["paths"] for fp in file_paths):
+            bias += 25
+        bias_by_key[key] = bias
+
+    # LLM candidates normalized once, not per item
+    llm_hints = []
+    for cand in llm_candidates or ():
+        conf = float(cand.get("confidence", 0))
+        if conf > 0:
+            llm_hints.append(((cand.get("item") or "").lower(), (cand.get("section") or "").lower(), conf))
+
+    llm_cap = max((int(conf * 50) for _, _, conf in llm_hints), default=0)
+
+    # A single unambiguous section bias narrows the scan to that section; full scan is the fallback
+    scans: List[Iterable[int]] = [range(len(roadmap_snapshot))]
+    biased_keys = [key for key, bias in bias_by_key.items() if bias]
+    if len(biased_keys) == 1 and not llm_candidates:
+        section_indexes = _section_indexes(roadmap_snapshot).get(biased_keys[0])
+        if section_indexes:
+            scans.insert(0, section_indexes)
+    if len(scans) == 1:
+        fts_ids = _fts_candidate_ids(entry_tokens)
+        if fts_ids:
+            fts_set = set(fts_ids)
+            scans.insert(0, [idx for idx, item in enumerate(roadmap_snapshot) if item["id"] in fts_set])
+
+    for indexes in scans:
+        debug_candidates: List[Tuple[int, str, str, int]] = []
+        # Best-first by upper bound (snapshot order on ties); stop once nothing left can win
+        bounds = {
+            idx: phrase_scores.get(idx, 0)
+            + roadmap_snapshot[idx]["token_score_cap"]
+            + bias_by_key.get(roadmap_snapshot[idx]["section_key"], 0)
+            + llm_cap
+            for idx in indexes
+        }
+        for idx in sorted(bounds, key=lambda i: (-bounds[i], i)):
+            if bounds[idx] < best_score:
                 break
+            if bounds[idx] == best_score and idx > best_idx:
+                continue
+            item = roadmap_snapshot[idx]
+            title = item["title_lower"]
+            section_title = item["section_title"]
+            section_title_lower = item["section_title_lower"]
 
-        if section_key and section_key in taxonomy:
-            for tok in taxonomy[section_key].get("tokens", []):
-                if tok in text:
-                    section_bias_score += 25
-                    break  # one token hit is enough
-            for path in taxonomy[section_key].get("paths", []):
-                if any(path in fp.lower() for fp in file_paths):
-                    section_bias_score += 25
-                    break
-
-        # Bonus if LLM suggested this item/section with confidence
-        llm_bonus = 0
-        if llm_candidates:
-            for cand in llm_candidates:
-                item_name = (cand.get("item") or "").lower()
-                section_name = (cand.get("section") or "").lower()
-                conf = float(cand.get("confidence", 0))
-                if conf <= 0:
-                    continue
+            score = phrase_scores.get(idx, 0)
+
+            # Token-level overlap with variable weights
+            for tok, weight in item["weighted_tokens"]:
+                if tok in entry_tokens:
+                    score += len(tok) * weight
+
+            # Section bias: strong bonus if text or file paths contain bias tokens that map to the section
+            section_bias_score = bias_by_key.get(item["section_key"], 0)
+
+            # Bonus if LLM suggested this item/section with confidence
+            llm_bonus = 0
+            for item_name, section_name, conf in llm_hints:
                 if item_name and item_name == title:
                     llm_bonus = max(llm_bonus, int(conf * 50))
                 elif section_name and section_name == section_title_lower:
                     llm_bonus = max(llm_bonus, int(conf * 25))
 
-        # Penalize very broad sections (e.g., Foundations) when no section-specific tokens matched
-        broad_section_penalty = 0
-        if "foundation" in section_title_lower and section_bias_score == 0:
-            broad_section_penalty = 15
+            # Penalize very broad sections (e.g., Foundations) when no section-specific tokens matched
+            broad_section_penalty = 0
+            if "foundation" in section_title_lower and section_bias_score == 0:
+                broad_section_penalty = 15
 
-        score += section_bias_score + llm_bonus - broad_section_penalty
+            score += section_bias_score + llm_bonus - broad_section_penalty
 
-        if score > best_score:
-            best_score = score
-            best_id = item.id
-        debug_candidates.append((item.id, section_title, title, score))
+            # Equal scores keep the earlier item, as a plain in-order scan would
+            if score > best_score or (best_id is not None and score == best_score and idx < best_idx):
+                best_score = score
+                best_idx = idx
+                best_id = item["id"]
+            debug_candidates.append((item["id"], section_title, title, score))
+        if best_score >= 8:
+            break
 
     # Require a minimal match; otherwise return None
     debug_candidates.sort(key=lambda t: t[3], reverse=True)
@@ -190,7 +497,106 @@ def _match_roadmap_item_by_text(
     return best_id if best_score >= 8 else None
 
 
-def _summarize_entry_with_groq(entry: Dict[str, Any]) -> Tuple[Optional[str], List[Dict[str, Any]]]:
+_SUMMARY_SYSTEM_PROMPT = (
+    "You write learning-focused summaries of GitHub activity. "
+    "Highlight what was built or learned and call out tools, libraries, frameworks, and languages involved. "
+    "Do NOT mention repository names, branches, delivery IDs, commit counts, or authors. "
+    "Avoid phrases like 'GitHub push' or other transport metadata. "
+    "Keep it concise: 1-2 sentences plus 2-4 short bullets, under 120 words total. "
+    "Also return the top 2 roadmap candidates using ONLY the section/item names from the provided outline, "
+    "with confidence 0-1."
+)
+_SUMMARY_MAX_TOKENS = 400
+_BATCH_MAX_TOKENS = 4000
+SUMMARY_CACHE_TTL_SECONDS = 24 * 60 * 60
+# Payload keys that cost prompt tokens without helping the summary
+_PROMPT_OMIT_KEYS = frozenset({"delivery_id", "compare_url", "commit_lines", "url"})
+_PROMPT_LIST_LIMIT = 20
+# Low-signal deliveries keep their raw content instead of paying for an LLM round-trip
+_TRIVIAL_MIN_CHARS = 40
+_TRIVIAL_MESSAGE_RE = re.compile(
+    r"^(?:Merge (?:branch|pull request|remote-tracking branch)\b|Bump |chore\(deps\))",
+    re.IGNORECASE,
+)
+
+
+def _is_trivial_entry(entry: Dict[str, Any]) -> bool:
+    """
+    True when an entry's messages are too short or all merge/version-bump boilerplate to summarize.
+    """
+    messages = [message for message in entry.get("messages") or () if message]
+    if sum(len(message) for message in messages) < _TRIVIAL_MIN_CHARS:
+        return True
+    return all(_TRIVIAL_MESSAGE_RE.match(message) for message in messages)
+
+
+def _slim_payload(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Reduce a summary payload to the fields the LLM needs.
+
+    Drops IDs/URLs and the per-commit lines (messages and files already carry the signal)
+    and caps list fields at _PROMPT_LIST_LIMIT items.
+    """
+    return {
+        key: value[:_PROMPT_LIST_LIMIT] if isinstance(value, (list, tuple)) else value
+        for key, value in payload.items()
+        if key not in _PROMPT_OMIT_KEYS
+    }
+
+
+def _summary_cache_key(payload: Dict[str, Any], roadmap_outline: str) -> str:
+    """
+    Cache key for a Groq summary: model + canonical payload (minus delivery ID) + roadmap outline.
+
+    Re-pushes of the same commits arrive under new delivery IDs, so the ID is left out.
+    """
+    canonical = {key: value for key, value in payload.items() if key != "delivery_id"}
+    digest = hashlib.sha256(orjson.dumps(canonical, option=orjson.OPT_SORT_KEYS))
+    digest.update(roadmap_outline.encode("utf-8"))
+    model = os.getenv("GROQ_MODEL", "llama-3.3-70b-versatile")
+    return f"groq_summary:{model}:{digest.hexdigest()}"
+
+
+def _parse_llm_json(content: str) -> Optional[Any]:
+    """
+    Parse a JSON reply from the LLM, recovering from fenced ```json blocks.
+
+    Both summary calls request JSON mode, so the fenced-block scan is only a safety net.
+    """
+    try:
+        return orjson.loads(content)
+    except orjson.JSONDecodeError:
+        pass
+
+    if "```" in content:
+        for block in content.split("```"):
+            block = block.strip()
+            if block.startswith("json"):
+                block = block[4:].strip()
+            if block.startswith("{") and block.endswith("}"):
+                try:
+                    return orjson.loads(block)
+                except orjson.JSONDecodeError:
+                    continue
+    return None
+
+
+def _summary_from_parsed(parsed: Dict[str, Any]) -> Tuple[Optional[str], List[Dict[str, Any]]]:
+    """
+    Extract (summary, roadmap_candidates) from a parsed summary object.
+    """
+    summary_text = (parsed.get("summary") or "").strip() or None
+    candidates = parsed.get("roadmap_candidates") or []
+    if not isinstance(candidates, list):
+        candidates = []
+    return summary_text, candidates
+
+
+def _summarize_entry_with_groq(
+    entry: Dict[str, Any],
+    roadmap_snapshot: Optional[List[Dict[str, Any]]] = None,
+    client: Optional[Groq] = None,
+) -> Tuple[Optional[str], List[Dict[str, Any]]]:
     """
     Use Groq LLM to create a concise learning log summary for a parsed event.
     Returns (summary text, roadmap_candidates) where roadmap_candidates is a list of
@@ -200,29 +606,25 @@ def _summarize_entry_with_groq(entry: Dict[str, Any]) -> Tuple[Optional[str], Li
     groq_api_key = os.getenv("GROQ_API_KEY")
     groq_model = os.getenv("GROQ_MODEL", "llama-3.3-70b-versatile")
 
-    if not payload or not groq_api_key:
-        return None, []
-
-    try:
-        client = Groq(api_key=groq_api_key)
-    except Exception as exc:
-        logger.error("Unable to initialize Groq client for webhook summarization: %s", exc)
+    if not payload or not groq_api_key or _is_trivial_entry(entry):
         return None, []
 
-    roadmap_outline = _roadmap_hint()
+    if client is None:
+        try:
+            client = _get_groq_client(groq_api_key)
+        except Exception as exc:
+            logger.error("Unable to initialize Groq client for webhook summarization: %s", exc)
+            return None, []
 
-    system_prompt = (
-        "You write learning-focused summaries of GitHub activity. "
-        "Highlight what was built or learned and call out tools, libraries, frameworks, and languages involved. "
-        "Do NOT mention repository names, branches, delivery IDs, commit counts, or authors. "
-        "Avoid phrases like 'GitHub push' or other transport metadata. "
-        "Keep it concise: 1-2 sentences plus 2-4 short bullets, under 120 words total. "
-        "Also return the top 2 roadmap candidates using ONLY the section/item names from the provided outline, "
-        "with confidence 0-1."
-    )
+    roadmap_outline = _roadmap_hint(roadmap_snapshot)
+    cache_key = _summary_cache_key(payload, roadmap_outline)
+    cached = cache.get(cache_key)
+    if cached is not None:
+        return cached
 
     raw_text = entry.get("content", "")
-    event_context = json.dumps(payload, indent=2)
+    # Compact JSON: fewer prompt tokens than an indented dump
+    event_context = orjson.dumps(_slim_payload(payload)).decode()
     user_prompt_parts = [
         "Source GitHub event data (JSON):",
         event_context,
@@ -243,36 +645,20 @@ def _summarize_entry_with_groq(entry: Dict[str, Any]) -> Tuple[Optional[str], Li
         response = client.chat.completions.create(
             model=groq_model,
             messages=[
-                {"role": "system", "content": system_prompt},
+                {"role": "system", "content": _SUMMARY_SYSTEM_PROMPT},
                 {"role": "user", "content": user_prompt},
             ],
             temperature=0.2,
-            max_tokens=400,
+            max_tokens=_SUMMARY_MAX_TOKENS,
+            response_format={"type": "json_object"},
         )
         content = response.choices[0].message.content.strip()
-        try:
-            parsed = json.loads(content)
-        except json.JSONDecodeError:
-            # Try to recover from fenced JSON blocks
-            if "```" in content:
-                fenced = content.split("```")
-                for block in fenced:
-                    block = block.strip()
-                    if block.startswith("{") and block.endswith("}"):
-                        try:
-                            parsed = json.loads(block)
-                            break
-                        except json.JSONDecodeError:
-                            continue
-            else:
-                parsed = None
+        parsed = _parse_llm_json(content)
 
         if parsed and isinstance(parsed, dict) and "summary" in parsed:
-            summary_text = (parsed.get("summary") or "").strip() or None
-            candidates = parsed.get("roadmap_candidates") or []
-            if not isinstance(candidates, list):
-                candidates = []
-            return summary_text, candidates
+            result = _summary_from_parsed(parsed)
+            cache.set(cache_key, result, timeout=SUMMARY_CACHE_TTL_SECONDS)
+            return result
 
         return content, []
     except Exception as exc:
@@ -280,6 +666,94 @@ def _summarize_entry_with_groq(entry: Dict[str, Any]) -> Tuple[Optional[str], Li
         return None, []
 
 
+def _summarize_entries_with_groq(
+    entries: List[Dict[str, Any]],
+    roadmap_snapshot: Optional[List[Dict[str, Any]]] = None,
+) -> List[Tuple[Optional[str], List[Dict[str, Any]]]]:
+    """
+    Summarize a batch of parsed events with a single Groq request.
+
+    The LLM is asked for {"summaries": [{id, summary, roadmap_candidates}]}; entries
+    missing from the reply (or an unparseable reply) fall back to one call per entry.
+    Previously summarized payloads are served from the Django cache and left out of the prompt.
+    Returns one (summary, roadmap_candidates) tuple per input entry, in order.
+    """
+    results: List[Tuple[Optional[str], List[Dict[str, Any]]]] = [(None, []) for _ in entries]
+    groq_api_key = os.getenv("GROQ_API_KEY")
+    if not groq_api_key or not any(entry.get("summary_payload") for entry in entries):
+        return results
+
+    roadmap_outline = _roadmap_hint(roadmap_snapshot)
+    batch: List[Dict[str, Any]] = []
+    cache_keys: Dict[int, str] = {}
+    for idx, entry in enumerate(entries):
+        payload = entry.get("summary_payload")
+        if not payload or _is_trivial_entry(entry):
+            continue
+        cache_keys[idx] = _summary_cache_key(payload, roadmap_outline)
+        cached = cache.get(cache_keys[idx])
+        if cached is not None:
+            results[idx] = cached
+        else:
+            batch.append({"id": idx, "payload": _slim_payload(payload), "raw": entry.get("content", "")})
+    if not batch:
+        return results
+
+    try:
+        client = _get_groq_client(groq_api_key)
+    except Exception as exc:
+        logger.error("Unable to initialize Groq client for webhook summarization: %s", exc)
+        return results
+
+    if len(batch) == 1:
+        idx = batch[0]["id"]
+        results[idx] = _summarize_entry_with_groq(entries[idx], roadmap_snapshot, client=client)
+        return results
+
+    user_prompt_parts = [
+        "GitHub events to summarize (JSON array of {id, payload, raw}):",
+        orjson.dumps(batch).decode(),
+    ]
+    if roadmap_outline:
+        user_prompt_parts.extend(["", "Roadmap outline:", roadmap_outline])
+    user_prompt_parts.append("")
+    user_prompt_parts.append(
+        "Summarize each event separately. Return a JSON object "
+        '{"summaries": [{"id": <event id>, "summary": string, '
+        '"roadmap_candidates": [{section, item, confidence}]}]} with one element per event. '
+        "Use exact section/item names from the outline."
+    )
+
+    pending_ids = {item["id"] for item in batch}
+    try:
+        response = client.chat.completions.create(
+            model=os.getenv("GROQ_MODEL", "llama-3.3-70b-versatile"),
+            messages=[
+                {"role": "system", "content": _SUMMARY_SYSTEM_PROMPT},
+                {"role": "user", "content": "\n".join(user_prompt_parts)},
+            ],
+            temperature=0.2,
+            max_tokens=min(_SUMMARY_MAX_TOKENS * len(batch), _BATCH_MAX_TOKENS),
+            response_format={"type": "json_object"},
+        )
+        parsed = _parse_llm_json(response.choices[0].message.content.strip())
+        summaries = parsed.get("summaries") if isinstance(parsed, dict) else None
+        for item in summaries if isinstance(summaries, list) else []:
+            if not isinstance(item, dict):
+                continue
+            idx = item.get("id")
+            if idx in pending_ids and "summary" in item:
+                results[idx] = _summary_from_parsed(item)
+                cache.set(cache_keys[idx], results[idx], timeout=SUMMARY_CACHE_TTL_SECONDS)
+                pending_ids.discard(idx)
+    except Exception as exc:
+        logger.error("Batched Groq summarization failed, falling back per entry: %s", exc)
+
+    for idx in sorted(pending_ids):
+        results[idx] = _summarize_entry_with_groq(entries[idx], roadmap_snapshot, client=client)
+    return results
+
+
 def _build_content_blocks(
     ai_summary: Optional[str],
     entry_content: str,
@@ -319,13 +793,21 @@ def _build_content_blocks(
     return display_block, content
 
 
-def _select_item_from_llm_candidates(candidates: List[Dict[str, Any]], confidence_threshold: float = 0.6) -> Optional[int]:
+def _select_item_from_llm_candidates(
+    candidates: List[Dict[str, Any]],
+    confidence_threshold: float = 0.6,
+    roadmap_snapshot: Optional[List[Dict[str, Any]]] = None,
+) -> Optional[int]:
     """
     Find the best RoadmapItem id from LLM-proposed candidates when confidence is high enough.
     """
     if not candidates:
         return None
 
+    if roadmap_snapshot is None:
+        roadmap_snapshot = _load_roadmap_snapshot()
+    lookup = _title_lookup(roadmap_snapshot)
+
     ordered = sorted(
         candidates,
         key=lambda c: float(c.get("confidence", 0) or 0),
@@ -335,22 +817,27 @@ def _select_item_from_llm_candidates(candidates: List[Dict[str, Any]], confidenc
         conf = float(cand.get("confidence", 0) or 0)
         if conf < confidence_threshold:
             continue
-        item_name = (cand.get("item") or "").strip().lower()
-        section_name = (cand.get("section") or "").strip().lower()
-
-        qs = RoadmapItem.objects.select_related("section").all()
-        if item_name:
-            qs = qs.filter(title__iexact=item_name)
-        if section_name:
-            qs = qs.filter(section__title__iexact=section_name) if item_name else qs.filter(section__title__iexact=section_name)
+        item_name = (cand.get("item") or "").strip().lower() or None
+        section_name = (cand.get("section") or "").strip().lower() or None
 
-        match = qs.first()
-        if match:
-            return match.id
+        item_id = lookup.get((item_name, section_name))
+        if item_id is not None:
+            return item_id
 
     return None
 
 
+def _remember_delivery(delivery_id: Optional[str]) -> None:
+    """Record a stored delivery ID in the process-local LRU."""
+    if not delivery_id:
+        return
+    with _recent_deliveries_lock:
+        _recent_deliveries[delivery_id] = None
+        _recent_deliveries.move_to_end(delivery_id)
+        while len(_recent_deliveries) > RECENT_DELIVERIES_MAX:
+            _recent_deliveries.popitem(last=False)
+
+
 def create_learning_entries_from_events(
     entries: List[Dict[str, Any]],
     delivery_id: Optional[str] = None,
@@ -358,76 +845,166 @@ def create_learning_entries_from_events(
     """
     Create LearningEntry records from parsed automation events.
 
-    Uses the GitHub delivery ID as a lightweight deduplication marker to avoid
-    reprocessing the same webhook delivery. If Groq credentials are present,
+    Uses the GitHub delivery ID (indexed, unique column) to avoid reprocessing
+    the same webhook delivery. If Groq credentials are present,
     a concise AI summary is prepended to the raw event text for the learning log.
     """
     if not entries:
         return {"created": 0, "skipped": 0, "reason": "no_entries"}
 
     dedup_marker = f"GitHub Delivery ID: {delivery_id}" if delivery_id else None
-    if dedup_marker and LearningEntry.objects.filter(content__icontains=dedup_marker).exists():
+    if delivery_id and delivery_id in _recent_deliveries:
+        logger.info("Skipping webhook delivery %s (recently processed)", delivery_id)
+        return {"created": 0, "skipped": len(entries), "reason": "duplicate_delivery"}
+    if delivery_id and LearningEntry.objects.filter(delivery_id=delivery_id).exists():
+        _remember_delivery(delivery_id)
         logger.info("Skipping webhook delivery %s (already processed)", delivery_id)
         return {"created": 0, "skipped": len(entries), "reason": "duplicate_delivery"}
 
-    messages: List[str] = []
-    for entry in entries:
-        messages.extend(entry.get("messages") or [])
-
-    created: List[int] = []
-    with transaction.atomic():
-        for entry in entries:
-            ai_summary, llm_candidates = _summarize_entry_with_groq(entry)
-            file_paths = entry.get("files") or (entry.get("summary_payload") or {}).get("files") or []
-
-            llm_match_id = _select_item_from_llm_candidates(llm_candidates)
-
-            # Prefer mapping by Groq summary/raw text; fallback to naive message match
-            roadmap_item_id = (
-                llm_match_id
-                or _match_roadmap_item_by_text(
-                    ai_summary,
-                    entry["content"],
-                    files=file_paths,
-                    llm_candidates=llm_candidates,
+    # Unique messages in first-seen order, streamed straight into the batch-wide fallback guess
+    messages = dict.fromkeys(
+        message for message in chain.from_iterable(entry.get("messages") or () for entry in entries) if message
+    )
+
+    # At most one roadmap query per batch (cached across deliveries); matchers and lookups below reuse it
+    roadmap_snapshot = _cached_roadmap_snapshot()
+    items_by_id = {item["id"]: item for item in roadmap_snapshot}
+    fallback_roadmap_id = _guess_roadmap_item_id(messages, roadmap_snapshot)
+
+    # One Groq round-trip for the whole delivery, made before the transaction opens
+    summaries = _summarize_entries_with_groq(entries, roadmap_snapshot)
+
+    pending: List[LearningEntry] = []
+    try:
+        with transaction.atomic():
+            for entry, (ai_summary, llm_candidates) in zip(entries, summaries, strict=True):
+                file_paths = entry.get("files") or (entry.get("summary_payload") or {}).get("files") or []
+
+                llm_match_id = _select_item_from_llm_candidates(llm_candidates, roadmap_snapshot=roadmap_snapshot)
+
+                # Prefer mapping by Groq summary/raw text; fallback to naive message match
+                roadmap_item_id = (
+                    llm_match_id
+                    or _match_roadmap_item_by_text(
+                        ai_summary,
+                        entry["content"],
+                        files=file_paths,
+                        llm_candidates=llm_candidates,
+                        roadmap_snapshot=roadmap_snapshot,
+                    )
+                    or fallback_roadmap_id
                 )
-                or _guess_roadmap_item_id(messages)
-            )
 
-            item = None
-            roadmap_line = None
-            roadmap_context = None
-            if roadmap_item_id:
-                item = RoadmapItem.objects.select_related("section").filter(id=roadmap_item_id).first()
-                if item and item.section:
-                    roadmap_line = f"Related to: {item.section.title} > {item.title}"
-                    if item.description:
-                        roadmap_context = item.description.strip()
-
-            title = "Learning update"
-            if item and item.section:
-                title = f"{item.section.order}. {item.section.title}"
-
-            _, content = _build_content_blocks(
-                ai_summary=ai_summary,
-                entry_content=entry["content"],
-                roadmap_line=roadmap_line,
-                roadmap_context=roadmap_context,
-                dedup_marker=dedup_marker,
-                file_paths=file_paths,
-            )
+                item = items_by_id.get(roadmap_item_id) if roadmap_item_id else None
+                roadmap_line = None
+                roadmap_context = None
+                if item:
+                    roadmap_line = f"Related to: {item['section_title']} > {item['title']}"
+                    if item["description"]:
+                        roadmap_context = item["description"].strip()
+
+                title = "Learning update"
+                if item:
+                    title = f"{item['section_order']}. {item['section_title']}"
+
+                _, content = _build_content_blocks(
+                    ai_summary=ai_summary,
+                    entry_content=entry["content"],
+                    roadmap_line=roadmap_line,
+                    roadmap_context=roadmap_context,
+                    dedup_marker=dedup_marker,
+                    file_paths=file_paths,
+                )
 
-            created_entry = LearningEntry.objects.create(
-                title=title,
-                content=content,
-                is_public=entry.get("is_public", True),
-                roadmap_item_id=entry.get("roadmap_item_id") or roadmap_item_id
-            )
-            created.append(created_entry.id)
+                pending.append(LearningEntry(
+                    title=title,
+                    content=content,
+                    is_public=entry.get("is_public", True),
+                    roadmap_item_id=entry.get("roadmap_item_id") or roadmap_item_id,
+                    # The unique column marks the delivery once, on its first entry
+                    delivery_id=(delivery_id or None) if not pending else None,
+                ))
+
+            # One multi-row INSERT; PostgreSQL (and SQLite 3.35+) return the new PKs
+            LearningEntry.objects.bulk_create(pending, batch_size=200)
+    except IntegrityError:
+        # A concurrent retry of the same delivery won the unique delivery_id race
+        _remember_delivery(delivery_id)
+        logger.info("Skipping webhook delivery %s (already processed)", delivery_id)
+        return {"created": 0, "skipped": len(entries), "reason": "duplicate_delivery"}
 
+    _remember_delivery(delivery_id)
+    created = [obj.id for obj in pending]
     return {
         "created": len(created),
         "skipped": 0,
         "roadmap_item_id": roadmap_item_id,
         "entry_ids": created,
     }
+
+
+def _run_learning_entries_task(entries: List[Dict[str, Any]], delivery_id: Optional[str]) -> None:
+    """
+    Worker-thread wrapper around create_learning_entries_from_events.
+
+    Retries failures with exponential backoff; after the last attempt the delivery
+    claim is released so a GitHub redelivery can be processed.
+    """
+    for attempt in range(1, TASK_MAX_ATTEMPTS + 1):
+        close_old_connections()
+        try:
+            result = create_learning_entries_from_events(entries, delivery_id=delivery_id)
+            logger.info(
+                "Processed webhook delivery %s: created=%s skipped=%s",
+                delivery_id,
+                result.get("created", 0),
+                result.get("skipped", 0),
+            )
+            return
+        except Exception:
+            if attempt == TASK_MAX_ATTEMPTS:
+                logger.exception("Failed to process webhook delivery %s", delivery_id)
+                _release_delivery(delivery_id)
+                return
+            logger.warning("Retrying webhook delivery %s (attempt %s failed)", delivery_id, attempt, exc_info=True)
+            time.sleep(TASK_RETRY_BACKOFF_SECONDS * 2 ** (attempt - 1))
+        finally:
+            close_old_connections()
+
+
+def _claim_delivery(delivery_id: Optional[str]) -> bool:
+    """
+    Atomically mark a delivery as in flight (cache.add is SETNX on Redis/Memcached).
+    """
+    if not delivery_id:
+        return True
+    return cache.add(f"{DELIVERY_CLAIM_PREFIX}{delivery_id}", 1, timeout=DELIVERY_CLAIM_TTL_SECONDS)
+
+
+def _release_delivery(delivery_id: Optional[str]) -> None:
+    if delivery_id:
+        cache.delete(f"{DELIVERY_CLAIM_PREFIX}{delivery_id}")
+
+
+def enqueue_learning_entries(entries: List[Dict[str, Any]], delivery_id: Optional[str] = None) -> bool:
+    """
+    Schedule learning entry creation outside the request/response cycle.
+
+    Runs inline when settings.AUTOMATION_TASKS_EAGER is set (tests, debugging).
+
+    Returns:
+        False if the delivery was already claimed (duplicate/redelivery in flight), else True
+    """
+    if not _claim_delivery(delivery_id):
+        logger.info("Skipping webhook delivery %s (already queued)", delivery_id)
+        return False
+
+    if getattr(settings, "AUTOMATION_TASKS_EAGER", False):
+        try:
+            create_learning_entries_from_events(entries, delivery_id=delivery_id)
+        except Exception:
+            _release_delivery(delivery_id)
+            raise
+        return True
+    _TASK_EXECUTOR.submit(_run_learning_entries_task, entries, delivery_id)
+    return True
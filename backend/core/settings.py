@@ -148,3 +148,9 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # MCP Server Configuration
 MCP_API_KEY = os.getenv('MCP_API_KEY', None)
 MCP_API_KEYS = os.getenv('MCP_API_KEYS', '').split(',') if os.getenv('MCP_API_KEYS') else []
+
+# Automation: run webhook tasks inline instead of on the background pool
+AUTOMATION_TASKS_EAGER = os.getenv('AUTOMATION_TASKS_EAGER', 'False') == 'True'
+
+# Automation: rank roadmap candidates with PostgreSQL full-text search before scoring
+AUTOMATION_FTS_MATCHING = os.getenv('AUTOMATION_FTS_MATCHING', 'False') == 'True'
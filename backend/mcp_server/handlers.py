@@ -17,50 +17,46 @@ from pgvector.django import CosineDistance
 import cohere
 
 
-def generate_embedding(text: str) -> list[float]:
-    """Generate embedding for text using Cohere"""
+def generate_embeddings(texts: list[str], input_type: str = "search_query") -> list[list[float]] | None:
+    """Generate embeddings for several texts with a single Cohere request"""
     api_key = os.getenv("COHERE_API_KEY")
     model_name = os.getenv("COHERE_EMBED_MODEL", "embed-english-v3.0")
 
     client = cohere.Client(api_key=api_key)
-    text = text.strip()[:8000]  # Limit length
+    texts = [text.strip()[:8000] for text in texts]  # Limit length
 
     try:
         resp = client.embed(
-            texts=[text],
+            texts=texts,
             model=model_name,
-            input_type="search_query",
+            input_type=input_type,
         )
-        return resp.embeddings[0]
+        return resp.embeddings
     except Exception as e:
         print(f"[MCP] Embedding failed (Rate Limit?): {e}")
         return None
 
 
+def generate_embedding(text: str) -> list[float]:
+    """Generate embedding for text using Cohere"""
+    embeddings = generate_embeddings([text])
+    return embeddings[0] if embeddings else None
+
+
 def handle_get_roadmap(arguments: dict) -> dict:
     """Get the complete AI Career Roadmap"""
-    sections = RoadmapSection.objects.prefetch_related('items').all().order_by('order')
-    
-    roadmap_data = []
-    for section in sections:
-        items = []
-        for item in section.items.all().order_by('order'):
-            items.append({
-                "id": item.id,
-                "title": item.title,
-                "description": item.description,
-                "order": item.order,
-                "is_active": item.is_active
-            })
-        
-        roadmap_data.append({
-            "id": section.id,
-            "title": section.title,
-            "description": section.description,
-            "order": section.order,
-            "items": items
-        })
-    
+    # Plain dicts straight from two queries; no model instances are hydrated
+    roadmap_data = list(RoadmapSection.objects.order_by('order').values('id', 'title', 'description', 'order'))
+    items_by_section = {}
+    for section in roadmap_data:
+        section["items"] = items_by_section[section["id"]] = []
+
+    item_rows = RoadmapItem.objects.order_by('order', 'id').values(
+        'id', 'title', 'description', 'order', 'is_active', 'section_id'
+    )
+    for item in item_rows.iterator(chunk_size=500):
+        items_by_section.setdefault(item.pop("section_id"), []).append(item)
+
     return {
         "success": True,
         "roadmap": roadmap_data,
@@ -74,7 +70,9 @@ def handle_get_learning_entries(arguments: dict) -> dict:
     roadmap_item_id = arguments.get("roadmap_item_id")
     limit = arguments.get("limit", 10)
     
-    queryset = LearningEntry.objects.select_related('roadmap_item').all()
+    queryset = LearningEntry.objects.select_related('roadmap_item').only(
+        'id', 'title', 'content', 'is_public', 'created_at', 'roadmap_item__title'
+    )
     
     if roadmap_item_id:
         queryset = queryset.filter(roadmap_item_id=roadmap_item_id)
@@ -185,24 +183,34 @@ def handle_add_learning_entry(arguments: dict) -> dict:
 def handle_get_progress_stats(arguments: dict) -> dict:
     """Get portfolio progress statistics"""
     
-    # Roadmap stats
+    # Roadmap stats (items joined to entries, hence the distinct counts)
     total_sections = RoadmapSection.objects.count()
-    total_items = RoadmapItem.objects.count()
-    active_items = RoadmapItem.objects.filter(is_active=True).count()
-    items_with_entries = RoadmapItem.objects.annotate(
-        entry_count=Count('learning_entries')
-    ).filter(entry_count__gt=0).count()
+    item_stats = RoadmapItem.objects.aggregate(
+        total=Count('id', distinct=True),
+        active=Count('id', filter=Q(is_active=True), distinct=True),
+        with_entries=Count('id', filter=Q(learning_entries__isnull=False), distinct=True),
+    )
+    total_items = item_stats["total"]
+    active_items = item_stats["active"]
+    items_with_entries = item_stats["with_entries"]
 
     # Learning entries stats
-    total_entries = LearningEntry.objects.count()
-    public_entries = LearningEntry.objects.filter(is_public=True).count()
-
-    # Knowledge base stats
-    total_chunks = KnowledgeChunk.objects.count()
-    chunks_by_source = {}
-    for source_type in ['learning_entry', 'roadmap_item', 'site_content', 'document']:
-        count = KnowledgeChunk.objects.filter(source_type=source_type).count()
-        chunks_by_source[source_type] = count
+    entry_stats = LearningEntry.objects.aggregate(
+        total=Count('id'),
+        public=Count('id', filter=Q(is_public=True)),
+    )
+    total_entries = entry_stats["total"]
+    public_entries = entry_stats["public"]
+
+    # Knowledge base stats: one GROUP BY, zero-filled for the known source types
+    counts_by_type = dict(
+        KnowledgeChunk.objects.order_by().values_list('source_type').annotate(count=Count('id'))
+    )
+    total_chunks = sum(counts_by_type.values())
+    chunks_by_source = {
+        source_type: counts_by_type.get(source_type, 0)
+        for source_type in ['learning_entry', 'roadmap_item', 'site_content', 'document']
+    }
 
     # Calculate completion percentage (items with learning entries)
     completion_percentage = (items_with_entries / total_items * 100) if total_items > 0 else 0
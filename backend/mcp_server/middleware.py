@@ -8,6 +8,8 @@ from django.conf import settings
 
 logger = logging.getLogger(__name__)
 
+MCP_PATH_PREFIX = '/api/mcp/'
+
 
 class MCPAuthenticationMiddleware:
     """
@@ -22,9 +24,21 @@ class MCPAuthenticationMiddleware:
     def __init__(self, get_response):
         self.get_response = get_response
 
+        # Settings are read once per middleware instance (i.e. per handler/process)
+        keys = list(getattr(settings, 'MCP_API_KEYS', None) or [])
+        single_key = getattr(settings, 'MCP_API_KEY', None)
+        if single_key:
+            keys.append(single_key)
+        self._valid_keys = frozenset(key for key in keys if key)
+
+        # Allow development mode without authentication
+        self._bypass = bool(settings.DEBUG and not self._valid_keys)
+        if self._bypass:
+            logger.warning("MCP authentication bypassed in DEBUG mode with no API keys configured")
+
     def __call__(self, request):
         # Only apply to MCP endpoints
-        if not request.path.startswith('/api/mcp/'):
+        if not request.path.startswith(MCP_PATH_PREFIX):
             return self.get_response(request)
 
         # Check for API key
@@ -66,22 +80,9 @@ class MCPAuthenticationMiddleware:
         Validate the provided API key
 
         In production, this should check against a database of valid keys.
-        For now, we check against a setting or environment variable.
+        For now, we check against MCP_API_KEYS / MCP_API_KEY, collected in __init__.
         """
-        # Get valid API keys from settings
-        valid_keys = getattr(settings, 'MCP_API_KEYS', [])
-
-        # Also check MCP_API_KEY environment variable (single key)
-        single_key = getattr(settings, 'MCP_API_KEY', None)
-        if single_key:
-            valid_keys.append(single_key)
-
-        # Allow development mode without authentication
-        if settings.DEBUG and not valid_keys:
-            logger.warning("MCP authentication bypassed in DEBUG mode with no API keys configured")
-            return True
-
-        return api_key in valid_keys
+        return self._bypass or api_key in self._valid_keys
 
     def _unauthorized_response(self, message: str):
         """Return 401 Unauthorized response"""
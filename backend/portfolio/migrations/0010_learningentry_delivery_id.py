@@ -0,0 +1,39 @@
+# Generated by Django 5.2.8 on 2026-10-15 09:14
+
+import re
+
+from django.db import migrations, models
+
+DELIVERY_MARKER_RE = re.compile(r"GitHub Delivery ID: (\S+)")
+
+
+def backfill_delivery_ids(apps, schema_editor):
+    """Copy delivery IDs out of the legacy content marker (first entry per delivery)."""
+    LearningEntry = apps.get_model("portfolio", "LearningEntry")
+    seen = set()
+    entries = LearningEntry.objects.filter(content__contains="GitHub Delivery ID: ").order_by("id")
+    for entry in entries.only("id", "content").iterator():
+        match = DELIVERY_MARKER_RE.search(entry.content)
+        if not match:
+            continue
+        delivery_id = match.group(1)[:64]
+        if delivery_id == "unknown" or delivery_id in seen:
+            continue
+        seen.add(delivery_id)
+        LearningEntry.objects.filter(id=entry.id).update(delivery_id=delivery_id)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('portfolio', '0009_securityaudit'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='learningentry',
+            name='delivery_id',
+            field=models.CharField(blank=True, max_length=64, null=True, unique=True),
+        ),
+        migrations.RunPython(backfill_delivery_ids, migrations.RunPython.noop),
+    ]
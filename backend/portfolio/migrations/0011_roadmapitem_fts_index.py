@@ -0,0 +1,33 @@
+# Generated by Django 5.2.8 on 2026-10-15 11:02
+
+from django.db import migrations
+
+# Must match the expression Django emits for SearchVector("title", "description", config="english")
+FTS_INDEX_NAME = "portfolio_roadmapitem_fts_idx"
+FTS_EXPRESSION = "to_tsvector('english'::regconfig, COALESCE(title, '') || ' ' || COALESCE(description, ''))"
+
+
+def create_fts_index(apps, schema_editor):
+    """GIN index for roadmap full-text matching (PostgreSQL only; SQLite test runs skip it)."""
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute(
+        f"CREATE INDEX IF NOT EXISTS {FTS_INDEX_NAME} ON portfolio_roadmapitem USING GIN ({FTS_EXPRESSION})"
+    )
+
+
+def drop_fts_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute(f"DROP INDEX IF EXISTS {FTS_INDEX_NAME}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('portfolio', '0010_learningentry_delivery_id'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_fts_index, drop_fts_index),
+    ]
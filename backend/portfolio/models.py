@@ -55,6 +55,8 @@ class LearningEntry(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     is_public = models.BooleanField(default=True)
+    # GitHub webhook delivery that produced this entry (indexed for deduplication)
+    delivery_id = models.CharField(max_length=64, unique=True, null=True, blank=True)
 
     class Meta:
         ordering = ["-created_at", "-id"]
@@ -1,4 +1,4 @@
-from django.db.models import F
+from django.db.models import F, Prefetch
 from rest_framework import generics
 from rest_framework.views import APIView
 from rest_framework.response import Response
@@ -16,7 +16,15 @@ from .serializers import RoadmapSectionSerializer, LearningEntrySerializer
 from .utils.utils import smart_retrieve
 
 class RoadmapSectionListView(generics.ListAPIView):
-    queryset = RoadmapSection.objects.all().prefetch_related("items")
+    # Ordered within the prefetch (no join back to sections) and limited to serialized columns
+    queryset = RoadmapSection.objects.all().prefetch_related(
+        Prefetch(
+            "items",
+            queryset=RoadmapItem.objects.only(
+                "id", "section_id", "title", "description", "order", "is_active", "status"
+            ).order_by("order", "id"),
+        )
+    )
     serializer_class = RoadmapSectionSerializer
 
 
@@ -79,12 +87,14 @@ class RoadmapProgressView(APIView):
 class RAGSearchView(APIView):
     """
     POST /api/rag/search/
-    Body: { "query": "...", "top_k": 5 }
-    Performs semantic search using RAG
+    Body: { "query": "...", "top_k": 5, "query_vector": [...] }
+    Performs semantic search using RAG; a caller that already embedded the
+    query with the same model may pass query_vector to skip the Cohere call
     """
     def post(self, request, *args, **kwargs):
         query = request.data.get("query", "").strip()
         top_k = request.data.get("top_k", 5)
+        query_vector = request.data.get("query_vector")
 
         if not query:
             return Response(
@@ -92,31 +102,43 @@ class RAGSearchView(APIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        # Setup Cohere client
-        cohere_api_key = os.getenv("COHERE_API_KEY")
-        cohere_model = os.getenv("COHERE_EMBED_MODEL", "embed-english-v3.0")
-
-        if not cohere_api_key:
-            return Response(
-                {"success": False, "error": "Cohere API key not configured"},
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR
-            )
+        if query_vector is not None:
+            dimensions = KnowledgeChunk._meta.get_field("vector").dimensions
+            if (
+                not isinstance(query_vector, list)
+                or len(query_vector) != dimensions
+                or not all(isinstance(x, (int, float)) and not isinstance(x, bool) for x in query_vector)
+            ):
+                return Response(
+                    {"success": False, "error": f"'query_vector' must be a list of {dimensions} numbers"},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+        else:
+            # Setup Cohere client
+            cohere_api_key = os.getenv("COHERE_API_KEY")
+            cohere_model = os.getenv("COHERE_EMBED_MODEL", "embed-english-v3.0")
+
+            if not cohere_api_key:
+                return Response(
+                    {"success": False, "error": "Cohere API key not configured"},
+                    status=status.HTTP_500_INTERNAL_SERVER_ERROR
+                )
 
-        co_client = cohere.Client(cohere_api_key)
+            co_client = cohere.Client(cohere_api_key)
 
-        # Generate embedding for query
-        try:
-            embed_resp = co_client.embed(
-                texts=[query],
-                model=cohere_model,
-                input_type="search_query"
-            )
-            query_vector = embed_resp.embeddings[0]
-        except Exception as e:
-            return Response(
-                {"success": False, "error": f"Failed to embed query: {str(e)}"},
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR
-            )
+            # Generate embedding for query
+            try:
+                embed_resp = co_client.embed(
+                    texts=[query],
+                    model=cohere_model,
+                    input_type="search_query"
+                )
+                query_vector = embed_resp.embeddings[0]
+            except Exception as e:
+                return Response(
+                    {"success": False, "error": f"Failed to embed query: {str(e)}"},
+                    status=status.HTTP_500_INTERNAL_SERVER_ERROR
+                )
 
         # Perform vector search
         try:
@@ -9,6 +9,14 @@ from portfolio.models import (
 )
 
 
+@pytest.fixture(autouse=True)
+def reset_roadmap_caches():
+    """Drops cached roadmap data; test rollbacks don't fire the invalidation signals"""
+    yield
+    from automation.tasks import _invalidate_roadmap_hint
+    _invalidate_roadmap_hint()
+
+
 @pytest.fixture
 def api_client():
     """Returns a Django REST framework API test client"""
@@ -136,8 +136,9 @@ class TestAutomationWebhook:
         return f"sha256={digest}", body
 
     def test_push_event_creates_entry_and_dedupes(self, api_client, settings, roadmap_item):
-        # Configure secret for signature verification
+        # Configure secret for signature verification; run the queued task inline
         settings.GITHUB_WEBHOOK_SECRET = "test-secret"
+        settings.AUTOMATION_TASKS_EAGER = True
 
         payload = {
             "ref": "refs/heads/main",
@@ -165,11 +166,12 @@ class TestAutomationWebhook:
             HTTP_X_GITHUB_DELIVERY="delivery-123",
         )
 
-        assert response.status_code == status.HTTP_201_CREATED
-        assert response.json()["created"] == 1
+        assert response.status_code == status.HTTP_202_ACCEPTED
+        assert response.json()["accepted"] is True
         assert LearningEntry.objects.count() == 1
         entry = LearningEntry.objects.first()
         assert "GitHub Delivery ID: delivery-123" in entry.content
+        assert entry.delivery_id == "delivery-123"
 
         # Duplicate delivery should be skipped
         response_dup = api_client.post(
@@ -182,9 +184,68 @@ class TestAutomationWebhook:
         )
 
         assert response_dup.status_code == status.HTTP_200_OK
-        assert response_dup.json()["skipped"] == 1
+        assert response_dup.json()["message"] == "Duplicate delivery ignored"
         assert LearningEntry.objects.count() == 1
 
+    def test_unsupported_pull_request_action_is_ignored(self, api_client, settings):
+        settings.GITHUB_WEBHOOK_SECRET = "test-secret"
+        payload = {"action": "labeled", "pull_request": {"number": 7, "title": "Tweak"}}
+        sig_header, body = self._sign_payload(settings.GITHUB_WEBHOOK_SECRET, payload)
+
+        response = api_client.post(
+            "/api/automation/github-webhook/",
+            data=body,
+            content_type="application/json",
+            HTTP_X_HUB_SIGNATURE_256=sig_header,
+            HTTP_X_GITHUB_EVENT="pull_request",
+            HTTP_X_GITHUB_DELIVERY="delivery-labeled",
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()["message"] == "Ignored pull_request action"
+        assert LearningEntry.objects.count() == 0
+
+    def test_large_payload_is_verified_while_streaming(self, api_client, settings, monkeypatch):
+        from automation import github_webhook
+
+        settings.GITHUB_WEBHOOK_SECRET = "test-secret"
+        monkeypatch.setattr(github_webhook, "_STREAM_THRESHOLD_BYTES", 0)
+        monkeypatch.setattr(github_webhook, "_STREAM_CHUNK_BYTES", 16)
+        sig_header, body = self._sign_payload(settings.GITHUB_WEBHOOK_SECRET, {"zen": "x" * 100})
+
+        def post(data):
+            return api_client.post(
+                "/api/automation/github-webhook/",
+                data=data,
+                content_type="application/json",
+                HTTP_X_HUB_SIGNATURE_256=sig_header,
+                HTTP_X_GITHUB_EVENT="ping",
+            )
+
+        assert post(body).status_code == status.HTTP_200_OK
+        assert post(body[:-1] + b" ").status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_replayed_signature_rejects_tampered_body(self, api_client, settings):
+        settings.GITHUB_WEBHOOK_SECRET = "test-secret"
+        payload = {"zen": "Keep it logically awesome."}
+        sig_header, body = self._sign_payload(settings.GITHUB_WEBHOOK_SECRET, payload)
+        headers = {
+            "HTTP_X_HUB_SIGNATURE_256": sig_header,
+            "HTTP_X_GITHUB_EVENT": "ping",
+            "HTTP_X_GITHUB_DELIVERY": "delivery-ping",
+        }
+
+        response = api_client.post(
+            "/api/automation/github-webhook/", data=body, content_type="application/json", **headers
+        )
+        assert response.status_code == status.HTTP_200_OK
+
+        # Same delivery ID and signature, different body: must be rejected
+        tampered = api_client.post(
+            "/api/automation/github-webhook/", data=body + b" ", content_type="application/json", **headers
+        )
+        assert tampered.status_code == status.HTTP_401_UNAUTHORIZED
+
     def test_limit_learning_entries(self, api_client, roadmap_item):
         """Test limit query parameter"""
         # Create multiple entries
@@ -283,6 +344,23 @@ class TestRAGSearchAPI:
         assert "error" in response.data
         assert "Missing 'query'" in response.data["error"]
 
+    def test_rag_search_invalid_query_vector(self, api_client):
+        """Test POST /api/rag/search/ with a malformed precomputed vector"""
+        url = "/api/rag/search/"
+        response = api_client.post(url, {"query": "neural networks", "query_vector": "0.1,0.2"}, format="json")
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert "query_vector" in response.data["error"]
+
+    def test_rag_search_query_vector_wrong_dimensions(self, api_client):
+        """Test POST /api/rag/search/ rejects empty or wrong-length vectors"""
+        url = "/api/rag/search/"
+        for vector in ([], [0.1] * 3):
+            response = api_client.post(url, {"query": "neural networks", "query_vector": vector}, format="json")
+
+            assert response.status_code == status.HTTP_400_BAD_REQUEST
+            assert "1024" in response.data["error"]
+
     def test_rag_search_with_query(self, api_client, knowledge_chunk):
         """Test RAG search with valid query (mocked)"""
         # Note: This will fail without COHERE_API_KEY in test environment
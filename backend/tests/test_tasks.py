@@ -1,7 +1,16 @@
 import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 
-from automation.tasks import _match_roadmap_item_by_text
-from portfolio.models import RoadmapSection, RoadmapItem
+from automation.tasks import (
+    _cached_roadmap_snapshot,
+    _invalidate_roadmap_hint,
+    _is_trivial_entry,
+    _load_roadmap_snapshot,
+    _match_roadmap_item_by_text,
+    create_learning_entries_from_events,
+)
+from portfolio.models import LearningEntry, RoadmapSection, RoadmapItem
 
 
 @pytest.mark.django_db
@@ -58,3 +67,63 @@ def test_match_returns_none_when_no_overlap():
     summary = "Updated UI colors and typography"
     matched_id = _match_roadmap_item_by_text(summary, raw="")
     assert matched_id is None
+
+
+@pytest.mark.django_db
+def test_match_with_snapshot_runs_no_queries(django_assert_num_queries):
+    assert _match_roadmap_item_by_text("Added MCP tools", raw="", roadmap_snapshot=[]) is None
+
+    agents_section = RoadmapSection.objects.create(title="2. Agents + MCP", order=2)
+    agents_item = RoadmapItem.objects.create(section=agents_section, title="MCP tools", order=1)
+    snapshot = _load_roadmap_snapshot()
+
+    with django_assert_num_queries(0):
+        matched_id = _match_roadmap_item_by_text("Added MCP tools", raw="", roadmap_snapshot=snapshot)
+    assert matched_id == agents_item.id
+
+
+@pytest.mark.django_db
+def test_create_entries_query_count_does_not_grow_per_entry(monkeypatch):
+    monkeypatch.delenv("GROQ_API_KEY", raising=False)
+    agents_section = RoadmapSection.objects.create(title="2. Agents + MCP", order=2)
+    RoadmapItem.objects.create(section=agents_section, title="MCP tools", order=1)
+
+    def run(count):
+        _invalidate_roadmap_hint()
+        entries = [
+            {"content": f"Added MCP tools #{n}", "messages": ["Added MCP tools"]}
+            for n in range(count)
+        ]
+        with CaptureQueriesContext(connection) as ctx:
+            result = create_learning_entries_from_events(entries)
+        assert result["created"] == count
+        return len(ctx.captured_queries)
+
+    assert run(1) == run(5)
+    assert LearningEntry.objects.filter(roadmap_item__title="MCP tools").count() == 6
+
+
+@pytest.mark.django_db
+def test_cached_roadmap_snapshot_reloads_after_roadmap_edit(django_assert_num_queries):
+    section = RoadmapSection.objects.create(title="2. Agents + MCP", order=2)
+    RoadmapItem.objects.create(section=section, title="MCP tools", order=1)
+
+    snapshot = _cached_roadmap_snapshot()
+    with django_assert_num_queries(0):
+        assert _cached_roadmap_snapshot() is snapshot
+
+    RoadmapItem.objects.create(section=section, title="Custom agents", order=2)
+    assert [item["title"] for item in _cached_roadmap_snapshot()] == ["MCP tools", "Custom agents"]
+
+
+@pytest.mark.parametrize(
+    "messages, trivial",
+    [
+        (["Fix typo"], True),
+        (["Merge branch 'main' into feature/webhooks", "Bump orjson from 3.10.17 to 3.10.18"], True),
+        (["Merge branch 'main'", "Add Aho-Corasick phrase matching for roadmap items"], False),
+        (["Add Aho-Corasick phrase matching for roadmap items"], False),
+    ],
+)
+def test_is_trivial_entry(messages, trivial):
+    assert _is_trivial_entry({"messages": messages}) is trivial